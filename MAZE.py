@@ -1,183 +1,34 @@
-from random import *
 import arcade
 import os
-import pickle
-import matplotlib.pyplot as plt
-
-MAZE = """
-?..x....
-....xxx.
-xxx.....
-....x.xx
-..xxx.x.
-....x...
-....x.x.
-......x!
-"""
-
-FILE_AGENT = 'mouse.qtable'
-
-TILE_WALL = 'x'
-
-ACTION_UP = 'U'
-ACTION_DOWN = 'D'
-ACTION_LEFT = 'L'
-ACTION_RIGHT = 'R'
-ACTIONS = [ACTION_UP, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT]
-REWARD_OUT = -100
-REWARD_WALL = -100
-REWARD_GOAL = 1000
-REWARD_DEFAULT = -1
 
-SPRITE_SIZE = 64
+from checkpoint import BackgroundSaver
+from metrics import MetricsStream
+from maze_engine import MAZE, FILE_AGENT, TILE_WALL, Agent, Environment
 
-MOVES = {ACTION_UP: (-1, 0),
-         ACTION_DOWN: (1, 0),
-         ACTION_LEFT: (0, -1),
-         ACTION_RIGHT: (0, 1)}
-
-
-def arg_max(table):
-    return max(table, key=table.get)
-
-
-class QTable:
-    def __init__(self, learning_rate=0.9, discount_factor=0.9):
-        self.dic = {}
-        self.learning_rate = learning_rate
-        self.discount_factor = discount_factor
-
-    def set(self, state, action, reward, new_state):
-        if state not in self.dic:
-            self.dic[state] = {ACTION_UP: 0, ACTION_DOWN: 0, ACTION_LEFT: 0, ACTION_RIGHT: 0}
-        if new_state not in self.dic:
-            self.dic[new_state] = {ACTION_UP: 0, ACTION_DOWN: 0, ACTION_LEFT: 0, ACTION_RIGHT: 0}
-
-        self.dic[state][action] += reward
-
-        delta = reward + self.discount_factor * max(self.dic[new_state].values()) - self.dic[state][action]
-        self.dic[state][action] += self.learning_rate * delta
-        # Q(s, a) = Q(s, a) + alpha * [reward + gamma * max(S', a) - Q(s, a)]
-
-    def best_action(self, position):
-        if position in self.dic:
-            return arg_max(self.dic[position])
-        else:
-            return choice(ACTIONS)
-
-    def __repr__(self):
-        res = ' ' * 11
-        for action in ACTIONS:
-            res += f'{action:5s}'
-        res += '\r\n'
-        for state in self.dic:
-            res += str(state) + " "
-            for action in self.dic[state]:
-                res += f"{self.dic[state][action]:5d}"
-            res += '\r\n'
-        return res
-
-
-class Agent:
-    def __init__(self, env):
-        self.env = env
-        self.history = []
-        self.score = None
-        self.reset()
-        self.qtable = QTable()
-        self.exploration = 0
-
-    def reset(self):
-        if self.score:
-            self.history.append(self.score)
-        self.position = env.start
-        self.score = 0
-
-    def shake(self, exploration=1.0):
-        self.exploration = 1.0
-
-    def save(self, filename):
-        with open(filename, 'wb') as file:
-            pickle.dump((self.qtable.dic, self.history), file)
-
-    def load(self, filename):
-        with open(filename, 'rb') as file:
-            self.qtable.dic, self.history = pickle.load(file)
-
-    def do(self, action=None):
-        if not action:
-            action = self.best_action()
-
-        new_position, reward = self.env.move(self.position, action)
-        self.qtable.set(self.position, action, reward, new_position)
-        self.position = new_position
-        self.score += reward
-
-        return action, reward
-
-    def best_action(self):
-        if random() < self.exploration:
-            self.exploration *= 0.999
-            return choice(ACTIONS)
-        else:
-            return self.qtable.best_action(self.position)
-
-    def __repr__(self):
-        return f"{self.position} score:{self.score} exploration:{self.exploration}"
-
-
-class Environment:
-    def __init__(self, text):
-        rows = text.strip().split('\n')
-        self.height = len(rows)
-        self.width = len(rows[0])
-        self.maze = {}
-        for i in range(len(rows)):
-            for j in range(len(rows[i])):
-                self.maze[(i, j)] = rows[i][j]
-                if rows[i][j] == '?':
-                    self.start = (i, j)
-                elif rows[i][j] == '!':
-                    self.goal = (i, j)
-
-    def move(self, position, action):
-        move = MOVES[action]
-        new_position = (position[0] + move[0], position[1] + move[1])
-
-        if new_position not in self.maze:
-            reward = REWARD_OUT
-        elif self.maze[new_position] in [TILE_WALL]:
-            reward = REWARD_WALL
-        elif self.maze[new_position] == '!':
-            reward = REWARD_GOAL
-            position = new_position
-        else:
-            reward = REWARD_DEFAULT
-            position = new_position
-
-        return position, reward
+SPRITE_SIZE = 64
 
 
 class MazeWindow(arcade.Window):
     def __init__(self, agent):
-        super().__init__(SPRITE_SIZE * env.width, SPRITE_SIZE * env.height, "ESGI Maze")
+        super().__init__(SPRITE_SIZE * agent.env.width, SPRITE_SIZE * agent.env.height, "ESGI Maze")
         self.agent = agent
         self.env = agent.env
+        self.saver = BackgroundSaver()
         arcade.set_background_color(arcade.color.AMAZON)
 
     def setup(self):
         self.walls = arcade.SpriteList()
-        for state in env.maze:
-            if env.maze[state] is TILE_WALL:
+        for state in self.env.maze:
+            if self.env.maze[state] is TILE_WALL:
                 sprite = self.create_sprite(':resources:images/tiles/boxCrate_double.png', state)
                 self.walls.append(sprite)
 
-        self.goal = self.create_sprite(':resources:images/tiles/signExit.png', env.goal)
-        self.player = self.create_sprite(':resources:images/enemies/mouse.png', agent.position)
+        self.goal = self.create_sprite(':resources:images/tiles/signExit.png', self.env.goal)
+        self.player = self.create_sprite(':resources:images/enemies/mouse.png', self.agent.position)
 
     def create_sprite(self, resource, state):
         sprite = arcade.Sprite(resource, 0.5)
-        sprite.center_x, sprite.center_y = (state[1] + 0.5) * SPRITE_SIZE, (env.height - state[0] - 0.5) * SPRITE_SIZE
+        sprite.center_x, sprite.center_y = (state[1] + 0.5) * SPRITE_SIZE, (self.env.height - state[0] - 0.5) * SPRITE_SIZE
         return sprite
 
     def on_draw(self):
@@ -192,7 +43,9 @@ class MazeWindow(arcade.Window):
             self.agent.do()
             self.player.center_x, self.player.center_y = \
                 (self.agent.position[1] + 0.5) * SPRITE_SIZE, \
-                (env.height - self.agent.position[0] - 0.5) * SPRITE_SIZE
+                (self.env.height - self.agent.position[0] - 0.5) * SPRITE_SIZE
+            if self.agent.position == self.env.goal:
+                self.agent.save(FILE_AGENT, self.saver)
 
     def on_key_press(self, key, modifiers):
         if key == arcade.key.R:
@@ -202,13 +55,18 @@ class MazeWindow(arcade.Window):
             self.setup()
         elif key == arcade.key.E:
             self.agent.shake()
+        elif key == arcade.key.V:
+            # Résolution exacte du labyrinthe actuel : numpy n'est chargé qu'à ce moment, par maze_solver
+            from maze_solver import MazeModel
+            MazeModel(self.env).warm_start(self.agent)
+            self.agent.save(FILE_AGENT, self.saver)
 
 
 if __name__ == "__main__":
     env = Environment(MAZE)
     print(env.start)
 
-    agent = Agent(env)
+    agent = Agent(env, MetricsStream('maze_episodes.jsonl', 10))
     if os.path.exists(FILE_AGENT):
         agent.load(FILE_AGENT)
     print(agent)
@@ -217,22 +75,13 @@ if __name__ == "__main__":
     window.setup()
     arcade.run()
 
+    window.saver.close()
     agent.save(FILE_AGENT)
+    agent.metrics.close()
 
+    # matplotlib n'est chargé que pour le graphique de fin de partie
+    import matplotlib.pyplot as plt
     plt.plot(agent.history)
     plt.show()
 
-    exit(0)
-    print(env.goal)
-    for i in range(50):
-        agent.reset()
-        iteration = 1
-        while agent.position != env.goal and iteration < 1000:
-            # print(f"#{iteration} {agent.position}")
-            action, reward = agent.do()
-            # print(f"{action} -> {agent.position} {reward}$")
-            iteration += 1
-        print(iteration)
-    print(agent.qtable)
-
 
@@ -0,0 +1,220 @@
+import argparse
+import os
+import random
+
+from telemetry import Telemetry
+from snake_engine import (
+    generate_map,
+    REWARD_FOOD, REWARD_KILL, REWARD_DIE,
+    FILE_AGENT, QTable, ArrayQTable, Snake, ScriptedSnake, Environment, observe,
+)
+from snake_trainer import MAX_EPISODE_STEPS, TrainingLoop
+
+
+class Arena(TrainingLoop):
+    def __init__(self, qtable, map_text, num_learners=4, num_scripted=4, num_food=30, num_bombs=10,
+                 max_steps=MAX_EPISODE_STEPS, telemetry=None):
+        # Chaque serpent naît sur une case libre après la pose de la nourriture et des bombes
+        free = map_text.count('.')
+        if num_learners + num_scripted + num_food + num_bombs > free:
+            raise ValueError(f"{num_learners + num_scripted} serpents, {num_food} nourritures et "
+                             f"{num_bombs} bombes pour seulement {free} cases libres")
+        super().__init__(qtable, max_steps, telemetry)
+        self.map_text = map_text
+        self.num_learners = num_learners
+        self.num_scripted = num_scripted
+        self.num_food = num_food
+        self.num_bombs = num_bombs
+        self.reset()
+
+    def reset(self):
+        self.env = Environment(self.map_text, self.num_food, self.num_bombs)
+        # Les apprenants partagent la même QTable
+        self.learners = [Snake(start_position=self.spawn_position(), qtable=self.qtable)
+                         for _ in range(self.num_learners)]
+        for snake in self.learners:
+            self.env.attach(snake)
+        self.scripted_snakes = []
+        for _ in range(self.num_scripted):
+            snake = ScriptedSnake(start_position=self.spawn_position())
+            self.env.attach(snake)
+            self.scripted_snakes.append(snake)
+        self.snakes = self.learners + self.scripted_snakes
+        # Serpents morts sans case libre pour renaître : hors du plateau jusqu'à ce qu'une case se libère
+        self.waiting = []
+        self.previous_heads = []
+        self.update_active()
+        self.episode_steps = 0
+        self.episode_score = 0
+
+    def update_active(self):
+        self.active_learners = [snake for snake in self.learners if snake not in self.waiting]
+        self.active_scripted = [snake for snake in self.scripted_snakes if snake not in self.waiting]
+        self.active = self.active_learners + self.active_scripted
+
+    def spawn_position(self):
+        if not self.env.free_cells:
+            return None
+        position = self.env.free_cells.sample()
+        self.env.free_cells.discard(position)
+        return position
+
+    def respawn(self, snake):
+        position = self.spawn_position()
+        if position is None:
+            return False
+        snake.reset(position)
+        self.env.attach(snake)
+        return True
+
+    def respawn_dead(self, snakes):
+        # Tous les corps sont retirés avant de chercher des cases, pour profiter de celles qu'ils libèrent
+        for snake in snakes:
+            for segment in snake.body:
+                self.env.release(segment)
+        self.waiting.extend(snakes)
+        self.respawn_waiting()
+
+    def respawn_waiting(self):
+        self.waiting = [snake for snake in self.waiting if not self.respawn(snake)]
+        self.update_active()
+
+    def resolve_collisions(self):
+        # Une passe sur les têtes : body_counts (grille d'occupation partagée) dit combien de
+        # segments occupent chaque case, ce qui évite de parcourir les corps
+        heads = {}
+        for i, snake in enumerate(self.active):
+            heads.setdefault(snake.body[0], []).append(i)
+        previous = {head: i for i, head in enumerate(self.previous_heads)}
+
+        dead = {}
+        for head, indices in heads.items():
+            if len(indices) > 1:
+                # Têtes dans la même case : tous meurent
+                for i in indices:
+                    dead[i] = None
+                continue
+            i = indices[0]
+            snake = self.active[i]
+            # Deux serpents qui échangent leurs cases : sans cou (longueur 1), aucun corps ne les sépare
+            j = previous.get(head)
+            if j is not None and j != i and self.active[j].body[0] == self.previous_heads[i]:
+                dead[i] = dead[j] = None
+                continue
+            # Segments d'autres serpents sous la tête (le serpent peut repasser sur lui-même)
+            if self.env.body_counts.get(head, 0) > snake.body.counts[head]:
+                dead[i] = self.killer(i, head)
+        return dead
+
+    def killer(self, victim, head):
+        # Appelé seulement en cas de mort : retrouve le propriétaire du corps percuté
+        for i, snake in enumerate(self.active):
+            if i != victim and head in snake.body:
+                return i
+        return None
+
+    def step(self):
+        if self.waiting:
+            self.respawn_waiting()
+        learners = self.active_learners
+        learner_states = [observe(self.env, snake) for snake in learners]
+        actions = [snake.decide_action(state) for snake, state in zip(learners, learner_states)]
+        actions += [snake.decide_action(self.env) for snake in self.active_scripted]
+
+        # Déplacements simultanés : tous les serpents bougent avant la résolution des collisions
+        self.previous_heads = [snake.body[0] for snake in self.active]
+        rewards = []
+        for snake, action in zip(self.active, actions):
+            new_head, reward = self.env.move(snake, action)
+            snake.move(new_head)
+            rewards.append(reward)
+
+        dead = self.resolve_collisions()
+        for victim, killer in dead.items():
+            rewards[victim] = REWARD_DIE
+            if killer is not None and killer not in dead:
+                rewards[killer] = REWARD_KILL
+                self.telemetry.count('kills')
+            self.telemetry.count('deaths')
+
+        for i, (snake, state, action) in enumerate(zip(learners, learner_states, actions)):
+            snake.update_qtable(state, action, rewards[i], observe(self.env, snake))
+            self.episode_score += rewards[i]
+            if rewards[i] == REWARD_FOOD:
+                self.telemetry.count('food_eaten')
+
+        if dead:
+            self.respawn_dead([self.active[i] for i in dead])
+
+        self.episode_steps += 1
+        self.total_steps += 1
+        self.telemetry.tick()
+        return self.episode_steps >= self.max_steps
+
+    def stats(self, start):
+        stats = super().stats(start)
+        stats["snakes"] = len(self.snakes)
+        stats["snake_steps_per_sec"] = self.total_steps * len(self.snakes) / stats["elapsed"]
+        return stats
+
+    def report_fields(self, stats):
+        counters = self.telemetry.counters
+        return [
+            f"score des apprenants {self.last_score}",
+            f"morts {counters.get('deaths', 0)}",
+            f"kills {counters.get('kills', 0)}",
+            f"{stats['steps_per_sec']:.0f} ticks/s",
+        ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Arène Snake Wars : plusieurs serpents sur une grande carte")
+    parser.add_argument("--learners", type=int, default=4)
+    parser.add_argument("--scripted", type=int, default=4)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--food", type=int, default=100)
+    parser.add_argument("--bombs", type=int, default=30)
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--max-steps", type=int, default=MAX_EPISODE_STEPS)
+    parser.add_argument("--save-every", type=int, default=0)
+    parser.add_argument("--report-every", type=int, default=1)
+    parser.add_argument("--file", default=FILE_AGENT)
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--backend", choices=["array", "dict"], default="dict",
+                        help="dict par défaut : la table dense devient très grosse sur les grandes cartes")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error", "off"], default="warning")
+    parser.add_argument("--metrics", help="fichier de métriques (.jsonl, ou .prom pour Prometheus)")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.backend == "array":
+        qtable = ArrayQTable(args.height, args.width)
+    else:
+        qtable = QTable()
+    if args.load and os.path.exists(args.file):
+        try:
+            qtable.load(args.file)
+        except ValueError as error:
+            parser.error(str(error))
+
+    telemetry = Telemetry(args.log_level, args.metrics)
+    try:
+        arena = Arena(qtable, generate_map(args.width, args.height), args.learners, args.scripted,
+                      args.food, args.bombs, args.max_steps, telemetry)
+    except ValueError as error:
+        parser.error(str(error))
+    stats = arena.train(args.episodes, args.save_every, args.file, args.report_every)
+    arena.saver.close()
+    telemetry.flush()
+    print(
+        f"{stats['snakes']} serpents : {stats['episodes']} épisodes, {stats['steps']} ticks en "
+        f"{stats['elapsed']:.2f}s ({stats['steps_per_sec']:.0f} ticks/s, "
+        f"{stats['snake_steps_per_sec']:.0f} déplacements/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+
+from snake_engine import (
+    ACTIONS, CELL_TYPES, CELL_WALL, generate_map,
+    QTable, ArrayQTable, Snake, ScriptedSnake, Environment, DistanceField, check_collision,
+)
+from snake_trainer import Trainer
+
+
+DEFAULT_SIZES = "30x25,60x50,120x100,240x200"
+DEFAULT_ITEMS = "30:10,300:100"
+DEFAULT_LENGTHS = "1,100,1000"
+
+# Au-delà de ce ratio par rapport à la référence, une mesure est signalée comme régression
+REGRESSION_THRESHOLD = 1.2
+
+# Modules qui doivent s'importer sans fenêtre, et ce qu'ils ne doivent pas charger
+HEADLESS_MODULES = [
+    "snake_engine", "snake_trainer", "snake_batch", "snake_hogwild", "arena",
+    "experience", "recording", "maze_engine", "maze_solver", "maze_trainer", "checkpoint", "telemetry",
+    "profiler", "metrics",
+]
+DISPLAY_MODULES = ["arcade", "pyglet", "matplotlib"]
+IMPORT_BUDGET = 1.0
+
+IMPORT_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(name for name in {display!r} if name in sys.modules))
+'''
+
+
+def parse_sizes(text):
+    return [tuple(int(v) for v in size.split('x')) for size in text.split(',')]
+
+
+def parse_items(text):
+    return [tuple(int(v) for v in items.split(':')) for items in text.split(',')]
+
+
+def parse_lengths(text):
+    return [int(v) for v in text.split(',')]
+
+
+def measure(operation, number, repeat=5):
+    # Meilleur temps par opération sur plusieurs répétitions
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation(number)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def grow_snake(snake, env, length, row_step=1):
+    # Fait grandir le serpent en serpentin depuis sa position, jusqu'à buter sur un mur
+    x, y = snake.body[0]
+    direction = 1 if y < env.width // 2 else -1
+    while len(snake.body) < length:
+        next_x, next_y = x, y + direction
+        if env.cell_at((next_x, next_y)) == CELL_WALL:
+            direction = -direction
+            next_x, next_y = x + row_step, y
+        if env.cell_at((next_x, next_y)) == CELL_WALL:
+            break
+        x, y = next_x, next_y
+        snake.grow = True
+        snake.move((x, y))
+
+
+def random_states(env, count):
+    interior = [(x, y) for x in range(1, env.height - 1) for y in range(1, env.width - 1)]
+    return [
+        (random.choice(interior), tuple(random.choice(CELL_TYPES) for _ in ACTIONS))
+        for _ in range(count)
+    ]
+
+
+def bench_env_move(size, items, length, number):
+    env = Environment(generate_map(*size), *items)
+    snake = Snake(start_position=(1, 1), qtable=QTable())
+    env.attach(snake)
+    grow_snake(snake, env, length)
+    actions = [random.choice(ACTIONS) for _ in range(1024)]
+
+    def run(n):
+        for i in range(n):
+            new_head, _ = env.move(snake, actions[i & 1023])
+            snake.move(new_head)
+    return measure(run, number)
+
+
+def bench_get_radar(size, items, number):
+    env = Environment(generate_map(*size), *items)
+    heads = [state[0] for state in random_states(env, 1024)]
+
+    def run(n):
+        for i in range(n):
+            env.get_radar(heads[i & 1023])
+    return measure(run, number)
+
+
+def bench_place_items(size, items, number):
+    env = Environment(generate_map(*size), *items)
+
+    def run(n):
+        for _ in range(n):
+            for position in env.place_items(1):
+                env.free_cells.add(position)
+    return measure(run, number)
+
+
+def bench_scripted_snake(size, items, number):
+    env = Environment(generate_map(*size), *items)
+    snake = ScriptedSnake(start_position=(env.height - 2, env.width - 2))
+    env.attach(snake)
+
+    def run(n):
+        for _ in range(n):
+            new_head, _ = env.move(snake, snake.decide_action(env))
+            snake.move(new_head)
+    return measure(run, number)
+
+
+def bench_qtable(backend, size, number):
+    env = Environment(generate_map(*size))
+    qtable = ArrayQTable(env.height, env.width) if backend == 'array' else QTable()
+    states = random_states(env, 1024)
+    if backend == 'array':
+        # États tels que les produit ArrayQTable.observe
+        states = [qtable.encode(state) for state in states]
+    actions = [random.choice(ACTIONS) for _ in range(1024)]
+
+    def run_set(n):
+        for i in range(n):
+            qtable.set(states[i & 1023], actions[i & 1023], -1, states[(i + 1) & 1023])
+
+    def run_best_action(n):
+        for i in range(n):
+            qtable.best_action(states[i & 1023])
+
+    qtable.epsilon = 0
+    return measure(run_set, number), measure(run_best_action, number)
+
+
+def bench_check_collision(length, number):
+    trainer = Trainer(QTable())
+    grow_snake(trainer.snake, trainer.env, length)
+    grow_snake(trainer.scripted_snake, trainer.env, length, row_step=-1)
+    snake, scripted_snake = trainer.snake, trainer.scripted_snake
+    return measure(lambda n: [check_collision(snake, scripted_snake) for _ in range(n)], number)
+
+
+def bench_episodes(size, episodes, max_steps):
+    trainer = Trainer(ArrayQTable(size[1], size[0]), size[0], size[1], max_steps)
+    start = time.perf_counter()
+    for _ in range(episodes):
+        trainer.run_episode()
+    elapsed = time.perf_counter() - start
+    return trainer.total_steps / elapsed, episodes / elapsed
+
+
+def bench_maze(number):
+    import maze_engine
+
+    env = maze_engine.Environment(maze_engine.MAZE)
+    qtable = maze_engine.QTable()
+    positions = [position for position, tile in env.maze.items() if tile != maze_engine.TILE_WALL]
+    moves = [(random.choice(positions), random.choice(maze_engine.ACTIONS)) for _ in range(1024)]
+
+    def run_move(n):
+        for i in range(n):
+            env.move(*moves[i & 1023])
+
+    def run_set(n):
+        for i in range(n):
+            position, action = moves[i & 1023]
+            qtable.set(position, action, -1, moves[(i + 1) & 1023][0])
+
+    return measure(run_move, number), measure(run_set, number)
+
+
+def bench_import(module, repeat=3):
+    # Interpréteur neuf à chaque fois : mesure le coût réel d'un worker ou d'un job headless
+    best = float('inf')
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(module=module, display=DISPLAY_MODULES)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split('\n')
+        best = min(best, float(output[0]))
+    loaded = [name for name in output[1].split(',') if name]
+    return best, loaded
+
+
+def run_suite(args):
+    sizes = parse_sizes(args.sizes)
+    items = parse_items(args.items)
+    lengths = parse_lengths(args.lengths)
+    number = args.number
+    results = {}
+
+    def record(key, value, unit='µs/op'):
+        results[key] = value
+        shown = value * 1e6 if unit == 'µs/op' else value
+        print(f"{key:<60} {shown:>12.2f} {unit}")
+
+    for size in sizes:
+        for item in items:
+            label = f"{size[0]}x{size[1]} items={item[0]}:{item[1]}"
+            random.seed(args.seed)
+            for length in lengths:
+                record(f"Environment.move {label} len={length}", bench_env_move(size, item, length, number))
+            random.seed(args.seed)
+            record(f"Environment.get_radar {label}", bench_get_radar(size, item, number))
+            random.seed(args.seed)
+            record(f"Environment.place_items {label}", bench_place_items(size, item, number))
+            random.seed(args.seed)
+            record(f"ScriptedSnake tick {label}", bench_scripted_snake(size, item, number))
+
+    for backend in ('dict', 'array'):
+        random.seed(args.seed)
+        set_time, best_time = bench_qtable(backend, sizes[0], number)
+        record(f"QTable.set backend={backend}", set_time)
+        record(f"QTable.best_action backend={backend}", best_time)
+
+    for length in lengths:
+        random.seed(args.seed)
+        record(f"check_collision len={length}", bench_check_collision(length, number))
+
+    for size in sizes:
+        random.seed(args.seed)
+        steps_per_sec, episodes_per_sec = bench_episodes(size, args.episodes, args.max_steps)
+        record(f"episodes {size[0]}x{size[1]} steps/s", steps_per_sec, 'pas/s')
+        record(f"episodes {size[0]}x{size[1]} episodes/s", episodes_per_sec, 'épisodes/s')
+
+    random.seed(args.seed)
+    move_time, set_time = bench_maze(number)
+    record("MAZE Environment.move", move_time)
+    record("MAZE QTable.set", set_time)
+
+    return results
+
+
+def run_startup(budget):
+    results = {}
+    failures = []
+    for module in HEADLESS_MODULES:
+        seconds, loaded = bench_import(module)
+        results[f"import {module}"] = seconds
+        print(f"{'import ' + module:<60} {seconds * 1000:>12.1f} ms")
+        if seconds > budget:
+            failures.append(f"import {module} : {seconds:.2f}s au-delà du budget de {budget:.2f}s")
+        if loaded:
+            failures.append(f"import {module} charge {', '.join(loaded)}")
+    return results, failures
+
+
+def check_distance_field(size, items, ticks):
+    # Après chaque nourriture mangée, le champ réparé doit être identique à une reconstruction complète
+    env = Environment(generate_map(*size), *items)
+    snakes = [ScriptedSnake(start_position=(1, 1)), ScriptedSnake(start_position=(env.height - 2, env.width - 2))]
+    for snake in snakes:
+        env.attach(snake)
+    field = env.distance_field()
+    checked = 0
+    for tick in range(ticks):
+        for snake in snakes:
+            # Un coup au hasard de temps en temps, pour manger aussi loin du gradient
+            action = random.choice(ACTIONS) if random.random() < 0.2 else snake.decide_action(env)
+            new_head, _ = env.move(snake, action)
+            snake.move(new_head)
+            if field.dist != DistanceField(env).dist:
+                return f"champ de distances {size[0]}x{size[1]} différent d'une reconstruction au tick {tick}"
+            checked += 1
+    return checked
+
+
+def run_checks(args):
+    failures = []
+    for size in parse_sizes(args.sizes):
+        for item in parse_items(args.items):
+            random.seed(args.seed)
+            result = check_distance_field(size, item, args.check_ticks)
+            if isinstance(result, str):
+                failures.append(result)
+            else:
+                print(f"{'DistanceField ' + f'{size[0]}x{size[1]} items={item[0]}:{item[1]}':<60} {result:>12} états vérifiés")
+    return failures
+
+
+def compare(results, baseline):
+    regressions = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        # Les débits (par seconde) sont meilleurs quand ils augmentent
+        higher_is_better = key.endswith('/s')
+        ratio = baseline[key] / value if higher_is_better else value / baseline[key]
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques de Snake Wars et MAZE")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="tailles de carte, ex. 30x25,120x100")
+    parser.add_argument("--items", default=DEFAULT_ITEMS, help="nourriture:bombes, ex. 30:10,300:100")
+    parser.add_argument("--lengths", default=DEFAULT_LENGTHS, help="longueurs de serpent, ex. 1,100,1000")
+    parser.add_argument("--number", type=int, default=5000, help="opérations par mesure")
+    parser.add_argument("--episodes", type=int, default=5)
+    parser.add_argument("--max-steps", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", help="enregistrer les résultats comme référence (JSON)")
+    parser.add_argument("--compare", help="comparer à une référence (JSON)")
+    parser.add_argument("--startup", action="store_true", help="mesurer aussi le temps d'import des modules headless")
+    parser.add_argument("--startup-only", action="store_true")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET, help="secondes par module")
+    parser.add_argument("--check", action="store_true",
+                        help="vérifier les structures incrémentales (champ de distances) contre une reconstruction complète")
+    parser.add_argument("--check-ticks", type=int, default=300)
+    args = parser.parse_args()
+
+    if args.check:
+        failures = run_checks(args)
+        for failure in failures:
+            print(f"VÉRIFICATION {failure}")
+        raise SystemExit(1 if failures else 0)
+
+    results = {} if args.startup_only else run_suite(args)
+    failures = []
+    if args.startup or args.startup_only:
+        startup, failures = run_startup(args.import_budget)
+        results.update(startup)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        print(f"Référence enregistrée dans {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline)
+        for key, ratio in regressions:
+            print(f"RÉGRESSION {key} : x{ratio:.2f}")
+        if regressions:
+            raise SystemExit(1)
+        print("Aucune régression par rapport à la référence.")
+
+    for failure in failures:
+        print(f"DÉMARRAGE {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
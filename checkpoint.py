@@ -0,0 +1,208 @@
+import mmap
+import os
+import pickle
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+
+# Fichier : en-tête puis segments ajoutés à chaque sauvegarde.
+# Chaque segment contient les états modifiés depuis la sauvegarde précédente ;
+# au chargement, les segments sont appliqués dans l'ordre.
+MAGIC = b'SWQT'
+VERSION = 1
+SEGMENT_MAGIC = b'SEGM'
+
+FILE_HEADER = struct.Struct('<4sIQI')      # magic, version, num_states, num_actions
+SEGMENT_HEADER = struct.Struct('<4sQI')    # magic, nombre d'enregistrements, crc32
+
+
+def record_dtype(num_actions):
+    # numpy est importé dans les fonctions de CheckpointFile seulement : le labyrinthe
+    # n'utilise que write_pickle et BackgroundSaver et démarre sans le charger
+    import numpy as np
+    return np.dtype([('state', '<i8'), ('q', '<f4', (num_actions,))])
+
+
+def is_checkpoint(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class CheckpointFile:
+    def __init__(self, filename, compact_factor=2.0, min_compact_records=10000):
+        self.filename = filename
+        self.compact_factor = compact_factor
+        self.min_compact_records = min_compact_records
+        # Taille du fichier jusqu'au dernier segment valide (connue du thread d'écriture)
+        self.valid_size = None
+        # Enregistrements dans le fichier une fois les snapshots en attente écrites
+        self.records = 0
+        # Un fichier qui n'a pas été chargé par cette table est réécrit entièrement
+        self.needs_compact = True
+
+    def snapshot(self, q, visited, dirty):
+        # Copie des lignes à écrire, prise sur le thread appelant ; l'écriture
+        # elle-même peut ensuite se faire en arrière-plan avec write()
+        import numpy as np
+        live = int(np.count_nonzero(visited))
+        compact = self.needs_compact or self.records > max(self.min_compact_records, self.compact_factor * live)
+        if compact:
+            dirty[:] = False
+            states = np.flatnonzero(visited)
+        else:
+            # dirty est remis à zéro avant la copie : une mise à jour concurrente
+            # marquera de nouveau l'état pour la prochaine sauvegarde
+            states = np.flatnonzero(dirty & visited)
+            dirty[states] = False
+        records = np.empty(len(states), dtype=record_dtype(q.shape[1]))
+        records['state'] = states
+        records['q'] = q[states]
+        if compact:
+            self.needs_compact = False
+            self.records = len(records)
+        else:
+            self.records += len(records)
+        return compact, q.shape, records
+
+    def write(self, snapshot):
+        compact, shape, records = snapshot
+        try:
+            if compact:
+                self.compact(shape, records)
+            else:
+                self.append(records)
+        except Exception:
+            # Les états de cette snapshot ne sont plus marqués : tout réécrire la prochaine fois
+            self.needs_compact = True
+            raise
+
+    def append(self, records):
+        if not len(records) or self.valid_size is None:
+            return
+
+        payload = records.tobytes()
+        with open(self.filename, 'r+b') as file:
+            file.seek(self.valid_size)
+            file.truncate()
+            file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(records), zlib.crc32(payload)))
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.valid_size += SEGMENT_HEADER.size + len(payload)
+
+    def compact(self, shape, records):
+        payload = records.tobytes()
+
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'wb') as file:
+            file.write(FILE_HEADER.pack(MAGIC, VERSION, shape[0], shape[1]))
+            file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(records), zlib.crc32(payload)))
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_filename, self.filename)
+
+        self.valid_size = FILE_HEADER.size + SEGMENT_HEADER.size + len(payload)
+
+    def scan(self, num_states, num_actions, apply=None):
+        self.valid_size = None
+        self.records = 0
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) < FILE_HEADER.size:
+            return
+
+        import numpy as np
+        dtype = record_dtype(num_actions)
+        with open(self.filename, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, file_states, file_actions = FILE_HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or version != VERSION or (file_states, file_actions) != (num_states, num_actions):
+                    return
+
+                offset = FILE_HEADER.size
+                while offset + SEGMENT_HEADER.size <= len(mm):
+                    segment_magic, count, crc = SEGMENT_HEADER.unpack_from(mm, offset)
+                    start = offset + SEGMENT_HEADER.size
+                    end = start + count * dtype.itemsize
+                    if segment_magic != SEGMENT_MAGIC or end > len(mm):
+                        break
+                    with memoryview(mm)[start:end] as payload:
+                        if zlib.crc32(payload) != crc:
+                            break
+                        if apply is not None:
+                            records = np.frombuffer(payload, dtype=dtype)
+                            apply(records)
+                            del records
+                    self.records += count
+                    offset = end
+                self.valid_size = offset
+
+    def load(self, q, visited):
+        num_states, num_actions = q.shape
+
+        def apply(records):
+            q[records['state']] = records['q']
+            visited[records['state']] = True
+
+        self.scan(num_states, num_actions, apply)
+        if self.valid_size is None:
+            raise ValueError(f"{self.filename} n'est pas une sauvegarde compatible")
+        self.needs_compact = False
+
+
+def write_pickle(filename, data):
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as file:
+        pickle.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_filename, filename)
+
+
+class BackgroundSaver:
+    def __init__(self, history=100, on_save=None):
+        self.jobs = queue.Queue()
+        # Appelé sur le thread d'écriture avec la latence de chaque sauvegarde terminée
+        self.on_save = on_save
+        self.thread = None
+        self.latencies = deque(maxlen=history)
+
+    def submit(self, write, *args):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.jobs.put((write, args))
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                write, args = job
+                start = time.perf_counter()
+                write(*args)
+                latency = time.perf_counter() - start
+                self.latencies.append(latency)
+                if self.on_save is not None:
+                    self.on_save(latency)
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde en arrière-plan : {e}")
+            finally:
+                self.jobs.task_done()
+
+    def flush(self):
+        self.jobs.join()
+
+    def close(self):
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def last_latency(self):
+        return self.latencies[-1] if self.latencies else None
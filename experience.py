@@ -0,0 +1,212 @@
+import argparse
+import os
+import struct
+import time
+
+import numpy as np
+
+from snake_engine import FILE_AGENT, ACTION_INDEX, ArrayQTable
+
+
+# États de ArrayQTable (entiers, voir ArrayQTable.observe) : ils n'ont de sens que pour la taille
+# de carte et le nombre de directions du radar de la table, que l'en-tête du fichier de débordement
+# enregistre avant la suite brute des transitions
+MAGIC = b'SWTR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sIIII')     # magic, version, hauteur, largeur, directions du radar
+
+TRANSITION_DTYPE = np.dtype([
+    ('state', '<i8'),
+    ('action', 'u1'),
+    ('reward', '<f4'),
+    ('next_state', '<i8'),
+])
+
+# Les transitions sont accumulées en Python puis copiées par blocs dans le tableau
+PENDING_CHUNK = 4096
+
+
+def table_layout(qtable):
+    return qtable.height, qtable.width, qtable.num_directions
+
+
+def read_layout(filename):
+    with open(filename, 'rb') as file:
+        header = file.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise ValueError(f"{filename} : en-tête de transitions incomplet")
+    magic, version, height, width, directions = FILE_HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{filename} n'est pas un fichier de transitions (ou version inconnue)")
+    return height, width, directions
+
+
+def check_layout(filename, layout):
+    found = read_layout(filename)
+    if found != tuple(layout):
+        raise ValueError(f"{filename} : transitions enregistrées pour une carte {found[1]}x{found[0]} et "
+                         f"{found[2]} directions, table {layout[1]}x{layout[0]} et {layout[2]} directions")
+
+
+def load_transitions(filename, layout):
+    check_layout(filename, layout)
+    # Une fin de fichier incomplète (écriture interrompue) est ignorée
+    count = (os.path.getsize(filename) - FILE_HEADER.size) // TRANSITION_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=TRANSITION_DTYPE)
+    return np.memmap(filename, dtype=TRANSITION_DTYPE, mode='r', offset=FILE_HEADER.size, shape=(count,))
+
+
+class ReplayBuffer:
+    def __init__(self, capacity, spill_file=None, layout=None, seed=None):
+        self.capacity = capacity
+        self.records = np.zeros(capacity, dtype=TRANSITION_DTYPE)
+        # Les transitions écrasées par le tampon circulaire sont ajoutées à ce fichier ;
+        # layout (voir table_layout) est écrit dans son en-tête, ou vérifié s'il existe déjà
+        self.spill_file = spill_file
+        self.layout = layout
+        if spill_file is not None:
+            self.open_spill_file()
+        self.rng = np.random.default_rng(seed)
+        self.pending = []
+        self.position = 0
+        self.size = 0
+        self.total = 0
+        self.spilled = 0
+
+    def open_spill_file(self):
+        if self.layout is None:
+            raise ValueError("un fichier de débordement nécessite la taille de la table (layout)")
+        if os.path.exists(self.spill_file) and os.path.getsize(self.spill_file):
+            check_layout(self.spill_file, self.layout)
+            return
+        with open(self.spill_file, 'wb') as file:
+            file.write(FILE_HEADER.pack(MAGIC, VERSION, *self.layout))
+
+    def add(self, state, action, reward, next_state):
+        self.pending.append((state, action, reward, next_state))
+        if len(self.pending) >= min(PENDING_CHUNK, self.capacity):
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunk = np.array(self.pending, dtype=TRANSITION_DTYPE)
+        self.pending = []
+        self.total += len(chunk)
+        first = min(len(chunk), self.capacity - self.position)
+        self.store(chunk[:first])
+        self.store(chunk[first:])
+
+    def store(self, chunk):
+        if not len(chunk):
+            return
+        start = self.position
+        end = start + len(chunk)
+        if start < self.size:
+            self.spill(self.records[start:min(end, self.size)])
+        self.records[start:end] = chunk
+        self.position = end % self.capacity
+        self.size = max(self.size, end)
+
+    def spill(self, records):
+        if self.spill_file is None or not len(records):
+            return
+        with open(self.spill_file, 'ab') as file:
+            file.write(records.tobytes())
+        self.spilled += len(records)
+
+    def sample(self, count):
+        self.flush()
+        if self.size == 0:
+            return self.records[:0]
+        return self.records[self.rng.integers(0, self.size, size=count)]
+
+    def close(self):
+        # Vide aussi le tampon dans le fichier, qui contient alors toutes les transitions dans l'ordre
+        self.flush()
+        if self.spill_file is not None and self.size:
+            self.spill(np.concatenate((self.records[self.position:self.size], self.records[:self.position])))
+            self.position = 0
+            self.size = 0
+
+    def __len__(self):
+        return self.size + len(self.pending)
+
+
+class OfflineLearner:
+    def __init__(self, qtable, replay=None, batch_size=65536, batches=1):
+        self.qtable = qtable
+        self.replay = replay
+        self.batch_size = batch_size
+        self.batches = batches
+        self.updates = 0
+
+    def record(self, state, action, reward, new_state):
+        self.replay.add(state, ACTION_INDEX[action], reward, new_state)
+
+    def update(self):
+        # Quelques lots tirés au hasard dans le tampon, appelé par exemple en fin d'épisode
+        for _ in range(self.batches):
+            self.learn(self.replay.sample(self.batch_size))
+
+    def learn(self, transitions):
+        qtable = self.qtable
+        q = qtable.q
+        num_actions = q.shape[1]
+        flat = q.reshape(-1)
+        for start in range(0, len(transitions), self.batch_size):
+            batch = transitions[start:start + self.batch_size]
+            states = batch['state']
+            next_states = batch['next_state']
+
+            # Mise à jour calculée sur la même version de la table pour tout le lot
+            targets = batch['reward'] + qtable.discount_factor * q[next_states].max(axis=1)
+            cells = states * num_actions + batch['action']
+            errors = targets - flat[cells]
+
+            # Une même (état, action) peut apparaître plusieurs fois : moyenne de ses erreurs
+            unique, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+            flat[unique] += qtable.learning_rate * (np.bincount(inverse, weights=errors) / counts)
+
+            qtable.visited[states] = True
+            qtable.visited[next_states] = True
+            qtable.dirty[states] = True
+            qtable.dirty[next_states] = True
+            self.updates += len(batch)
+        qtable.recount()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apprentissage hors ligne de la QTable à partir de transitions enregistrées")
+    parser.add_argument("transitions", nargs="+", help="fichiers de transitions (--replay-file de snake_trainer.py)")
+    parser.add_argument("--file", default=FILE_AGENT)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    # Taille de carte et directions du radar lues dans l'en-tête du premier fichier
+    try:
+        height, width, directions = read_layout(args.transitions[0])
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    qtable = ArrayQTable(height, width, num_directions=directions)
+    if os.path.exists(args.file):
+        try:
+            qtable.load(args.file)
+        except ValueError as error:
+            parser.error(str(error))
+    learner = OfflineLearner(qtable, batch_size=args.batch_size)
+
+    start = time.perf_counter()
+    for _ in range(args.epochs):
+        for filename in args.transitions:
+            learner.learn(load_transitions(filename, table_layout(qtable)))
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    qtable.save(args.file)
+    print(f"{learner.updates} transitions apprises en {elapsed:.2f}s ({learner.updates / elapsed:.0f} transitions/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import runpy
+import sys
+
+# Modules des jeux importés d'avance : le lancement n'attend plus que la commande
+import MAZE  # noqa: F401 -- import voulu : c'est lui qui pré-chauffe le worker
+import snake_wars  # noqa: F401
+
+script_path = sys.stdin.readline().strip()
+if script_path:
+    sys.argv = [script_path]
+    sys.path.insert(0, os.path.dirname(script_path))
+    runpy.run_path(script_path, run_name="__main__")
@@ -1,16 +1,80 @@
 import tkinter as tk
 from PIL import Image, ImageTk
+import argparse
 import subprocess
 import os
 import sys
 
+THUMBNAIL_CACHE = os.path.join(".cache", "thumbnails")
+POLL_INTERVAL_MS = 500
+
+# Jeux lancés : nom -> Popen
+processes = {}
+# Interpréteur de réserve, modules du jeu déjà importés (--prewarm)
+warm_worker = None
+
+def load_thumbnail(path, scale=0.4):
+    # Miniature redimensionnée une seule fois, puis relue depuis le cache tant que l'image ne change pas
+    stat = os.stat(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(THUMBNAIL_CACHE, f"{name}-{scale}-{stat.st_mtime_ns}-{stat.st_size}.png")
+    if os.path.exists(cached):
+        return Image.open(cached)
+
+    image = Image.open(path)
+    image = image.resize(
+        (int(image.width * scale), int(image.height * scale)),
+        Image.Resampling.LANCZOS
+    )
+    os.makedirs(THUMBNAIL_CACHE, exist_ok=True)
+    image.save(cached)
+    return image
+
+def start_warm_worker():
+    global warm_worker
+    worker_path = os.path.join(os.getcwd(), "game_worker.py")
+    warm_worker = subprocess.Popen([sys.executable, worker_path], stdin=subprocess.PIPE, text=True)
+
+def launch(name, script):
+    process = processes.get(name)
+    if process is not None and process.poll() is None:
+        return
+
+    script_path = os.path.join(os.getcwd(), script)
+    if warm_worker is not None and warm_worker.poll() is None:
+        # Le worker déjà prêt exécute le jeu ; un nouveau se prépare pour le prochain lancement
+        warm_worker.stdin.write(script_path + "\n")
+        warm_worker.stdin.close()
+        processes[name] = warm_worker
+        start_warm_worker()
+    else:
+        processes[name] = subprocess.Popen([sys.executable, script_path])
+    update_status()
+
 def launch_maze():
-    script_path = os.path.join(os.getcwd(), "MAZE.py")
-    subprocess.run([sys.executable, script_path])
+    launch("maze", "MAZE.py")
 
 def launch_snake_wars():
-    script_path = os.path.join(os.getcwd(), "snake_wars.py")
-    subprocess.run([sys.executable, script_path])
+    launch("snake_wars", "snake_wars.py")
+
+def update_status():
+    for name, label in status_labels.items():
+        process = processes.get(name)
+        if process is None:
+            label.config(text="")
+        elif process.poll() is None:
+            label.config(text=f"En cours (pid {process.pid})")
+        else:
+            label.config(text=f"Terminé (code {process.returncode})")
+
+def poll_processes():
+    update_status()
+    window.after(POLL_INTERVAL_MS, poll_processes)
+
+def on_close():
+    if warm_worker is not None and warm_worker.poll() is None:
+        warm_worker.stdin.close()
+    window.destroy()
 
 def on_enter_button(button):
     button.config(bg="#1e8449", font=("Helvetica", 16, "bold"))
@@ -18,24 +82,19 @@ def on_enter_button(button):
 def on_leave_button(button):
     button.config(bg="#27ae60", font=("Helvetica", 14))
 
+parser = argparse.ArgumentParser(description="Lanceur des jeux")
+parser.add_argument("--prewarm", action="store_true", help="garder un interpréteur prêt pour des lancements quasi instantanés")
+args = parser.parse_args()
+if args.prewarm:
+    start_warm_worker()
+
 window = tk.Tk()
 window.title("Game Launcher")
 window.geometry("800x400")
 window.config(bg="#34495e")
 
-maze_image = Image.open("assets/maze_bg.png")
-maze_image = maze_image.resize(
-    (int(maze_image.width * 0.4), int(maze_image.height * 0.4)),
-    Image.Resampling.LANCZOS
-)
-maze_bg = ImageTk.PhotoImage(maze_image)
-
-snake_image = Image.open("assets/snake_bg.png")
-snake_image = snake_image.resize(
-    (int(snake_image.width * 0.4), int(snake_image.height * 0.4)),
-    Image.Resampling.LANCZOS
-)
-snake_bg = ImageTk.PhotoImage(snake_image)
+maze_bg = ImageTk.PhotoImage(load_thumbnail("assets/maze_bg.png"))
+snake_bg = ImageTk.PhotoImage(load_thumbnail("assets/snake_bg.png"))
 
 frame_maze = tk.Frame(window, width=400, height=400)
 frame_maze.pack(side="left", fill="both", expand=True)
@@ -83,4 +142,11 @@ button_snake_wars.place(relx=0.5, rely=0.5, anchor="center")
 button_snake_wars.bind("<Enter>", lambda e: on_enter_button(button_snake_wars))
 button_snake_wars.bind("<Leave>", lambda e: on_leave_button(button_snake_wars))
 
+status_labels = {}
+for name, frame in (("maze", frame_maze), ("snake_wars", frame_snake)):
+    status_labels[name] = tk.Label(frame, text="", font=("Helvetica", 11), bg="#34495e", fg="#ecf0f1")
+    status_labels[name].place(relx=0.5, rely=0.62, anchor="center")
+
+window.protocol("WM_DELETE_WINDOW", on_close)
+poll_processes()
 window.mainloop()
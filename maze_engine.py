@@ -0,0 +1,176 @@
+from random import *
+import pickle
+from collections import deque
+
+from checkpoint import write_pickle
+
+MAZE = """
+?..x....
+....xxx.
+xxx.....
+....x.xx
+..xxx.x.
+....x...
+....x.x.
+......x!
+"""
+
+FILE_AGENT = 'mouse.qtable'
+# Scores gardés avec la QTable ; l'historique complet va dans le flux de métriques
+HISTORY_LENGTH = 1000
+
+TILE_WALL = 'x'
+
+ACTION_UP = 'U'
+ACTION_DOWN = 'D'
+ACTION_LEFT = 'L'
+ACTION_RIGHT = 'R'
+ACTIONS = [ACTION_UP, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT]
+REWARD_OUT = -100
+REWARD_WALL = -100
+REWARD_GOAL = 1000
+REWARD_DEFAULT = -1
+
+MOVES = {ACTION_UP: (-1, 0),
+         ACTION_DOWN: (1, 0),
+         ACTION_LEFT: (0, -1),
+         ACTION_RIGHT: (0, 1)}
+
+
+def generate_maze(width, height, wall_ratio=0.25):
+    # Murs tirés au hasard, départ en haut à gauche et sortie en bas à droite (pas forcément atteignable)
+    rows = [''.join(TILE_WALL if random() < wall_ratio else '.' for _ in range(width)) for _ in range(height)]
+    rows[0] = '?' + rows[0][1:]
+    rows[-1] = rows[-1][:-1] + '!'
+    return '\n'.join(rows)
+
+
+def arg_max(table):
+    return max(table, key=table.get)
+
+
+class QTable:
+    def __init__(self, learning_rate=0.9, discount_factor=0.9):
+        self.dic = {}
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+
+    def set(self, state, action, reward, new_state):
+        if state not in self.dic:
+            self.dic[state] = {ACTION_UP: 0, ACTION_DOWN: 0, ACTION_LEFT: 0, ACTION_RIGHT: 0}
+        if new_state not in self.dic:
+            self.dic[new_state] = {ACTION_UP: 0, ACTION_DOWN: 0, ACTION_LEFT: 0, ACTION_RIGHT: 0}
+
+        self.dic[state][action] += reward
+
+        delta = reward + self.discount_factor * max(self.dic[new_state].values()) - self.dic[state][action]
+        self.dic[state][action] += self.learning_rate * delta
+        # Q(s, a) = Q(s, a) + alpha * [reward + gamma * max(S', a) - Q(s, a)]
+
+    def best_action(self, position):
+        if position in self.dic:
+            return arg_max(self.dic[position])
+        else:
+            return choice(ACTIONS)
+
+    def __repr__(self):
+        res = ' ' * 11
+        for action in ACTIONS:
+            res += f'{action:5s}'
+        res += '\r\n'
+        for state in self.dic:
+            res += str(state) + " "
+            for action in self.dic[state]:
+                res += f"{self.dic[state][action]:5d}"
+            res += '\r\n'
+        return res
+
+
+class Agent:
+    def __init__(self, env, metrics=None):
+        self.env = env
+        self.metrics = metrics
+        self.history = deque(maxlen=HISTORY_LENGTH)
+        self.score = None
+        self.reset()
+        self.qtable = QTable()
+        self.exploration = 0
+
+    def reset(self):
+        if self.score:
+            self.history.append(self.score)
+            if self.metrics is not None:
+                self.metrics.append(self.score, self.steps, self.exploration, len(self.qtable.dic))
+        self.position = self.env.start
+        self.score = 0
+        self.steps = 0
+
+    def shake(self, exploration=1.0):
+        self.exploration = exploration
+
+    def save(self, filename, saver=None):
+        if saver is None:
+            write_pickle(filename, (self.qtable.dic, list(self.history)))
+        else:
+            # Copie de la QTable et de l'historique pour une écriture cohérente en arrière-plan
+            snapshot = ({state: dict(values) for state, values in self.qtable.dic.items()}, list(self.history))
+            saver.submit(write_pickle, filename, snapshot)
+
+    def load(self, filename):
+        with open(filename, 'rb') as file:
+            self.qtable.dic, history = pickle.load(file)
+        self.history = deque(history, maxlen=HISTORY_LENGTH)
+
+    def do(self, action=None):
+        if not action:
+            action = self.best_action()
+
+        new_position, reward = self.env.move(self.position, action)
+        self.qtable.set(self.position, action, reward, new_position)
+        self.position = new_position
+        self.score += reward
+        self.steps += 1
+
+        return action, reward
+
+    def best_action(self):
+        if random() < self.exploration:
+            self.exploration *= 0.999
+            return choice(ACTIONS)
+        else:
+            return self.qtable.best_action(self.position)
+
+    def __repr__(self):
+        return f"{self.position} score:{self.score} exploration:{self.exploration}"
+
+
+class Environment:
+    def __init__(self, text):
+        rows = text.strip().split('\n')
+        self.height = len(rows)
+        self.width = len(rows[0])
+        self.maze = {}
+        for i in range(len(rows)):
+            for j in range(len(rows[i])):
+                self.maze[(i, j)] = rows[i][j]
+                if rows[i][j] == '?':
+                    self.start = (i, j)
+                elif rows[i][j] == '!':
+                    self.goal = (i, j)
+
+    def move(self, position, action):
+        move = MOVES[action]
+        new_position = (position[0] + move[0], position[1] + move[1])
+
+        if new_position not in self.maze:
+            reward = REWARD_OUT
+        elif self.maze[new_position] in [TILE_WALL]:
+            reward = REWARD_WALL
+        elif self.maze[new_position] == '!':
+            reward = REWARD_GOAL
+            position = new_position
+        else:
+            reward = REWARD_DEFAULT
+            position = new_position
+
+        return position, reward
@@ -0,0 +1,142 @@
+import argparse
+import time
+
+import numpy as np
+
+from maze_engine import (
+    MAZE, FILE_AGENT, TILE_WALL, ACTIONS, MOVES,
+    REWARD_OUT, REWARD_WALL, REWARD_GOAL, REWARD_DEFAULT,
+    generate_maze, Agent, Environment,
+)
+
+
+class MazeModel:
+    def __init__(self, env):
+        # Le labyrinthe compilé en tableaux : case i * width + j, actions dans l'ordre de ACTIONS
+        self.height = env.height
+        self.width = env.width
+        self.start = env.start
+        self.goal = env.goal
+        size = self.height * self.width
+        tiles = np.array([env.maze.get((i, j), '') for i in range(self.height) for j in range(self.width)])
+        rows, columns = np.divmod(np.arange(size), self.width)
+        goal = self.index(self.goal)
+
+        # Case hors du dictionnaire (ligne plus courte) : traitée comme l'extérieur, comme dans Environment.move
+        inside = tiles != ''
+        walls = tiles == TILE_WALL
+        self.next_states = np.empty((size, len(ACTIONS)), dtype=np.int64)
+        self.rewards = np.empty((size, len(ACTIONS)), dtype=np.float64)
+        for a, action in enumerate(ACTIONS):
+            di, dj = MOVES[action]
+            target_rows = rows + di
+            target_columns = columns + dj
+            valid = (target_rows >= 0) & (target_rows < self.height) & (target_columns >= 0) & (target_columns < self.width)
+            target = np.where(valid, target_rows * self.width + target_columns, 0)
+            valid &= inside[target]
+            blocked = valid & walls[target]
+            moved = valid & ~blocked
+            self.next_states[:, a] = np.where(moved, target, np.arange(size))
+            self.rewards[:, a] = np.where(~valid, REWARD_OUT, np.where(blocked, REWARD_WALL, np.where(
+                target == goal, REWARD_GOAL, REWARD_DEFAULT)))
+
+        # Cases que la valeur peut changer : ni mur, ni sortie (état terminal, valeur 0)
+        self.passable = inside & ~walls
+        self.passable[goal] = False
+
+        # Prédécesseurs par action : les déplacements sont des translations, donc au plus un par case
+        self.previous_states = np.full((len(ACTIONS), size), -1, dtype=np.int64)
+        states = np.arange(size)
+        for a in range(len(ACTIONS)):
+            moved = self.next_states[:, a] != states
+            self.previous_states[a, self.next_states[moved, a]] = states[moved]
+
+    def index(self, position):
+        return position[0] * self.width + position[1]
+
+    def position(self, index):
+        return divmod(int(index), self.width)
+
+    def lower_bound(self, discount_factor):
+        # Meilleur retour sans jamais atteindre la sortie : faire des allers-retours entre deux cases
+        # libres, ou à défaut se cogner sur place. L'itération part de là et ne fait que monter,
+        # donc seules les cases atteintes par la récompense de la sortie sont recalculées.
+        states = np.arange(len(self.next_states))
+        loops = self.next_states == states[:, None]
+        stay = np.where(loops, self.rewards, -np.inf).max(axis=1) / (1 - discount_factor)
+        wander = (~loops & self.passable[self.next_states]).any(axis=1)
+        values = np.where(wander, np.maximum(stay, REWARD_DEFAULT / (1 - discount_factor)), stay)
+        values[~self.passable] = 0.0
+        return values
+
+    def value_iteration(self, discount_factor=0.9, tolerance=1e-9, max_sweeps=None):
+        # Itération sur la valeur par front : à chaque passe, seuls les prédécesseurs des cases dont
+        # la valeur vient de changer sont réévalués, en une opération vectorisée
+        values = self.lower_bound(discount_factor)
+        frontier = np.array([self.index(self.goal)])
+        solved = np.zeros(len(values), dtype=bool)
+        sweeps = 0
+        while len(frontier) and (max_sweeps is None or sweeps < max_sweeps):
+            candidates = np.unique(np.concatenate((frontier, self.previous_states[:, frontier].ravel())))
+            candidates = candidates[candidates >= 0]
+            candidates = candidates[self.passable[candidates]]
+            best = (self.rewards[candidates] + discount_factor * values[self.next_states[candidates]]).max(axis=1)
+            improved = best > values[candidates] + tolerance
+            frontier = candidates[improved]
+            values[frontier] = best[improved]
+            solved[frontier] = True
+            sweeps += 1
+        return values, solved, sweeps
+
+    def q_values(self, values, states, discount_factor=0.9):
+        return self.rewards[states] + discount_factor * values[self.next_states[states]]
+
+    def warm_start(self, agent, discount_factor=None, tolerance=1e-9):
+        # Remplit la QTable de l'agent avec les valeurs optimales ; les cases que la sortie
+        # n'atteint pas (inaccessibles ou trop loin pour le facteur d'actualisation) restent absentes
+        if discount_factor is None:
+            discount_factor = agent.qtable.discount_factor
+        values, solved, sweeps = self.value_iteration(discount_factor, tolerance)
+        states = np.flatnonzero(solved)
+        q = self.q_values(values, states, discount_factor)
+        dic = agent.qtable.dic
+        for state, row in zip(states.tolist(), q.tolist()):
+            dic[self.position(state)] = dict(zip(ACTIONS, row))
+        dic[self.goal] = {action: 0 for action in ACTIONS}
+        return len(states), sweeps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Résolution du labyrinthe par itération sur la valeur")
+    parser.add_argument("--width", type=int, help="labyrinthe aléatoire de cette taille (par défaut : MAZE)")
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--wall-ratio", type=float, default=0.25)
+    parser.add_argument("--discount", type=float, help="facteur d'actualisation (par défaut : celui de la QTable)")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    parser.add_argument("--save", action="store_true", help=f"enregistrer l'agent dans {FILE_AGENT}")
+    args = parser.parse_args()
+
+    if args.width:
+        text = generate_maze(args.width, args.height or args.width, args.wall_ratio)
+    else:
+        text = MAZE
+
+    start = time.perf_counter()
+    env = Environment(text)
+    agent = Agent(env)
+    parsed = time.perf_counter()
+    model = MazeModel(env)
+    compiled = time.perf_counter()
+    states, sweeps = model.warm_start(agent, args.discount, args.tolerance)
+    solved = time.perf_counter()
+
+    print(f"{env.height}x{env.width} : lecture {parsed - start:.3f}s, compilation {compiled - parsed:.3f}s, "
+          f"résolution {solved - compiled:.3f}s ({sweeps} passes, {states} états résolus)")
+    if env.start not in agent.qtable.dic:
+        print("Aucune valeur au départ : sortie inaccessible ou trop loin pour ce facteur d'actualisation")
+    if args.save:
+        agent.save(FILE_AGENT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import os
+import random
+import time
+from collections import deque
+
+from checkpoint import BackgroundSaver
+from metrics import MetricsStream
+from maze_engine import MAZE, FILE_AGENT, generate_maze, Agent, Environment
+
+
+MAX_EPISODE_STEPS = 1000
+
+
+class MazeTrainer:
+    def __init__(self, agent, max_steps=MAX_EPISODE_STEPS, window=20):
+        self.agent = agent
+        self.env = agent.env
+        self.max_steps = max_steps
+        # Nombre de pas jusqu'à la sortie sur les derniers épisodes (None : sortie non atteinte)
+        self.recent = deque(maxlen=window)
+
+        self.total_steps = 0
+        self.total_episodes = 0
+        # Premier épisode depuis lequel le nombre de pas jusqu'à la sortie n'a plus changé
+        self.stable_since = None
+        self.saver = BackgroundSaver()
+
+    def run_episode(self):
+        agent = self.agent
+        agent.reset()
+        goal = self.env.goal
+        while agent.position != goal and agent.steps < self.max_steps:
+            agent.do()
+
+        self.total_episodes += 1
+        self.total_steps += agent.steps
+        steps = agent.steps if agent.position == goal else None
+        if steps is None or not self.recent or steps != self.recent[-1]:
+            self.stable_since = self.total_episodes if steps is not None else None
+        self.recent.append(steps)
+        return steps
+
+    def converged(self):
+        # Même nombre de pas sur toute la fenêtre : la politique gloutonne ne change plus
+        return self.stable_since is not None and self.total_episodes - self.stable_since + 1 >= self.recent.maxlen
+
+    def train(self, episodes, save_every=0, filename=FILE_AGENT, report_every=10, stop_on_convergence=False):
+        start = time.perf_counter()
+        for episode in range(1, episodes + 1):
+            self.run_episode()
+
+            if save_every and episode % save_every == 0:
+                self.agent.save(filename, self.saver)
+            if report_every and episode % report_every == 0:
+                self.report(start)
+            if stop_on_convergence and self.converged():
+                break
+
+        # Le score du dernier épisode n'est enregistré qu'au reset suivant
+        self.agent.reset()
+        self.agent.save(filename, self.saver)
+        self.saver.flush()
+        return self.stats(start)
+
+    def stats(self, start):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        reached = [steps for steps in self.recent if steps is not None]
+        return {
+            "episodes": self.total_episodes,
+            "steps": self.total_steps,
+            "elapsed": elapsed,
+            "steps_per_sec": self.total_steps / elapsed,
+            "episodes_per_sec": self.total_episodes / elapsed,
+            "success_rate": len(reached) / max(len(self.recent), 1),
+            "steps_to_goal": sum(reached) / len(reached) if reached else None,
+            "best_steps": min(reached) if reached else None,
+            "exploration": self.agent.exploration,
+            "states": len(self.agent.qtable.dic),
+        }
+
+    def report(self, start):
+        stats = self.stats(start)
+        steps_to_goal = "-" if stats['steps_to_goal'] is None else f"{stats['steps_to_goal']:.1f}"
+        print(
+            f"Épisode {stats['episodes']} | pas jusqu'à la sortie {steps_to_goal} (min {stats['best_steps']}) | "
+            f"sorties {stats['success_rate']:.0%} | {stats['episodes_per_sec']:.1f} épisodes/s | "
+            f"{stats['steps_per_sec']:.0f} pas/s | exploration {stats['exploration']:.3f} | états {stats['states']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement headless du labyrinthe")
+    parser.add_argument("--episodes", type=int, default=500)
+    parser.add_argument("--max-steps", type=int, default=MAX_EPISODE_STEPS)
+    parser.add_argument("--width", type=int, help="labyrinthe aléatoire de cette taille (par défaut : MAZE)")
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--wall-ratio", type=float, default=0.25)
+    parser.add_argument("--exploration", type=float, default=0.0, help="probabilité initiale d'action au hasard")
+    parser.add_argument("--window", type=int, default=20, help="épisodes identiques pour considérer la convergence")
+    parser.add_argument("--stop-on-convergence", action="store_true")
+    parser.add_argument("--save-every", type=int, default=0)
+    parser.add_argument("--report-every", type=int, default=10)
+    parser.add_argument("--file", default=FILE_AGENT)
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--discount", type=float, help="facteur d'actualisation (plus proche de 1 sur les grands labyrinthes)")
+    parser.add_argument("--warm-start", action="store_true", help="partir de la solution de maze_solver.py")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--episodes-file", help="flux des scores par épisode (python metrics.py FICHIER pour le graphique)")
+    parser.add_argument("--aggregate-every", type=int, default=10, help="épisodes par point du graphique")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.width:
+        text = generate_maze(args.width, args.height or args.width, args.wall_ratio)
+    else:
+        text = MAZE
+    env = Environment(text)
+    metrics = MetricsStream(args.episodes_file, args.aggregate_every) if args.episodes_file else None
+    agent = Agent(env, metrics)
+    if args.load and os.path.exists(args.file):
+        agent.load(args.file)
+    if args.discount is not None:
+        agent.qtable.discount_factor = args.discount
+    if args.warm_start:
+        # numpy n'est chargé que pour la résolution exacte, par maze_solver
+        from maze_solver import MazeModel
+        MazeModel(env).warm_start(agent)
+    agent.shake(args.exploration)
+
+    trainer = MazeTrainer(agent, args.max_steps, args.window)
+    stats = trainer.train(args.episodes, args.save_every, args.file, args.report_every, args.stop_on_convergence)
+    trainer.saver.close()
+    if metrics is not None:
+        metrics.close()
+
+    print(
+        f"{stats['episodes']} épisodes, {stats['steps']} pas en {stats['elapsed']:.2f}s "
+        f"({stats['episodes_per_sec']:.1f} épisodes/s, {stats['steps_per_sec']:.0f} pas/s)"
+    )
+    if trainer.converged():
+        print(f"Convergence : {trainer.recent[-1]} pas jusqu'à la sortie depuis l'épisode {trainer.stable_since}")
+    else:
+        print("Pas de convergence : le nombre de pas jusqu'à la sortie varie encore")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import time
+
+
+def aggregate_filename(filename):
+    root, ext = os.path.splitext(filename)
+    return f"{root}.agg{ext or '.jsonl'}"
+
+
+def last_episode(filename):
+    # Reprise d'un flux existant : numéro du dernier épisode, lu en fin de fichier
+    if not os.path.exists(filename):
+        return 0
+    with open(filename, 'rb') as file:
+        file.seek(max(0, os.path.getsize(filename) - 4096))
+        lines = file.read().splitlines()
+    for line in reversed(lines):
+        try:
+            return json.loads(line)['episode']
+        except (ValueError, KeyError):
+            continue
+    return 0
+
+
+class MetricsStream:
+    def __init__(self, filename, bucket_size=100):
+        # Une ligne JSON par épisode, plus un agrégat tous les bucket_size épisodes
+        # dans un second fichier, le seul que lit le graphique en direct
+        self.filename = filename
+        self.bucket_size = bucket_size
+        self.file = open(filename, 'a', buffering=1)
+        self.aggregate_file = open(aggregate_filename(filename), 'a', buffering=1)
+        self.episodes = last_episode(filename)
+        self.reset_bucket()
+
+    def reset_bucket(self):
+        self.count = 0
+        self.score_sum = 0
+        self.score_min = None
+        self.score_max = None
+        self.steps_sum = 0
+
+    def append(self, score, steps, epsilon=None, states=None):
+        self.episodes += 1
+        record = {'time': time.time(), 'episode': self.episodes, 'score': score, 'steps': steps,
+                  'epsilon': epsilon, 'states': states}
+        self.file.write(json.dumps(record) + '\n')
+
+        self.count += 1
+        self.score_sum += score
+        self.score_min = score if self.score_min is None else min(self.score_min, score)
+        self.score_max = score if self.score_max is None else max(self.score_max, score)
+        self.steps_sum += steps
+        self.last_record = record
+        if self.count >= self.bucket_size:
+            self.write_aggregate()
+
+    def write_aggregate(self):
+        record = self.last_record
+        self.aggregate_file.write(json.dumps({
+            'time': record['time'],
+            'episode': self.episodes,
+            'count': self.count,
+            'score_mean': self.score_sum / self.count,
+            'score_min': self.score_min,
+            'score_max': self.score_max,
+            'steps_mean': self.steps_sum / self.count,
+            'epsilon': record['epsilon'],
+            'states': record['states'],
+        }) + '\n')
+        self.reset_bucket()
+
+    def close(self):
+        # Les derniers épisodes forment un agrégat partiel (count < bucket_size)
+        if self.count:
+            self.write_aggregate()
+        self.file.close()
+        self.aggregate_file.close()
+
+
+class AggregateReader:
+    def __init__(self, filename, max_points=2000):
+        self.filename = filename
+        self.max_points = max_points
+        self.offset = 0
+        self.points = []
+
+    def read_new(self):
+        # Lit seulement ce qui a été ajouté depuis le dernier appel, lignes complètes uniquement
+        if not os.path.exists(self.filename):
+            return False
+        with open(self.filename, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read()
+        end = data.rfind(b'\n') + 1
+        if not end:
+            return False
+        self.offset += end
+        for line in data[:end].splitlines():
+            if line.strip():
+                self.points.append(json.loads(line))
+        while len(self.points) > self.max_points:
+            self.downsample()
+        return True
+
+    def downsample(self):
+        # Fusion deux à deux : la mémoire reste bornée quelle que soit la durée de l'entraînement
+        merged = []
+        for first, second in zip(self.points[0::2], self.points[1::2]):
+            count = first['count'] + second['count']
+            point = dict(second)
+            point['count'] = count
+            point['score_mean'] = (first['score_mean'] * first['count'] + second['score_mean'] * second['count']) / count
+            point['steps_mean'] = (first['steps_mean'] * first['count'] + second['steps_mean'] * second['count']) / count
+            point['score_min'] = min(first['score_min'], second['score_min'])
+            point['score_max'] = max(first['score_max'], second['score_max'])
+            merged.append(point)
+        if len(self.points) % 2:
+            merged.append(self.points[-1])
+        self.points = merged
+
+
+def live_plot(filename, interval=1.0, max_points=2000):
+    import matplotlib.pyplot as plt
+
+    reader = AggregateReader(aggregate_filename(filename), max_points)
+    figure, (score_axis, steps_axis) = plt.subplots(2, 1, sharex=True)
+    figure.canvas.manager.set_window_title(f"Métriques - {filename}")
+    mean_line, = score_axis.plot([], [], label="Score moyen")
+    min_line, = score_axis.plot([], [], alpha=0.4, label="Min")
+    max_line, = score_axis.plot([], [], alpha=0.4, label="Max")
+    steps_line, = steps_axis.plot([], [], label="Longueur moyenne")
+    score_axis.set_ylabel("Score")
+    score_axis.legend(loc="upper left")
+    score_axis.grid()
+    steps_axis.set_xlabel("Épisode")
+    steps_axis.set_ylabel("Pas")
+    steps_axis.grid()
+
+    while plt.fignum_exists(figure.number):
+        if reader.read_new():
+            episodes = [point['episode'] for point in reader.points]
+            mean_line.set_data(episodes, [point['score_mean'] for point in reader.points])
+            min_line.set_data(episodes, [point['score_min'] for point in reader.points])
+            max_line.set_data(episodes, [point['score_max'] for point in reader.points])
+            steps_line.set_data(episodes, [point['steps_mean'] for point in reader.points])
+            for axis in (score_axis, steps_axis):
+                axis.relim()
+                axis.autoscale_view()
+        plt.pause(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graphique en direct des métriques d'entraînement")
+    parser.add_argument("file", help="flux de métriques par épisode (.jsonl)")
+    parser.add_argument("--interval", type=float, default=1.0, help="secondes entre deux lectures")
+    parser.add_argument("--max-points", type=int, default=2000)
+    args = parser.parse_args()
+    live_plot(args.file, args.interval, args.max_points)
+
+
+if __name__ == "__main__":
+    main()
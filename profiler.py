@@ -0,0 +1,73 @@
+import csv
+import time
+from collections import deque
+
+from telemetry import noop
+
+
+class PhaseProfiler:
+    def __init__(self, enabled=False, window=300, history=10000):
+        self.window = window
+        self.phases = []
+        # Derniers ticks : (numéro du tick, {phase: secondes})
+        self.ticks = deque(maxlen=history)
+        self.tick_count = 0
+        self.current = None
+        self.last_time = 0.0
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        # Désactivé, chaque point de mesure est un no-op : pas de lecture d'horloge
+        if enabled:
+            self.start = self._start
+            self.mark = self._mark
+            self.end = self._end
+        else:
+            self.start = self.mark = self.end = noop
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+        return self.enabled
+
+    def _start(self):
+        self.current = {}
+        self.last_time = time.perf_counter()
+
+    def _mark(self, phase):
+        now = time.perf_counter()
+        current = self.current
+        if current is None:
+            return
+        current[phase] = current.get(phase, 0.0) + now - self.last_time
+        if phase not in self.phases:
+            self.phases.append(phase)
+        self.last_time = time.perf_counter()
+
+    def _end(self):
+        if self.current is None:
+            return
+        self.tick_count += 1
+        self.ticks.append((self.tick_count, self.current))
+        self.current = None
+
+    def summary(self):
+        # Moyenne par tick sur la fenêtre glissante : [(phase, secondes, part du total)]
+        recent = list(self.ticks)[-self.window:]
+        if not recent:
+            return []
+        totals = {phase: 0.0 for phase in self.phases}
+        for _, timings in recent:
+            for phase, seconds in timings.items():
+                totals[phase] += seconds
+        total = sum(totals.values()) or 1e-12
+        return [(phase, totals[phase] / len(recent), totals[phase] / total) for phase in self.phases]
+
+    def dump_csv(self, filename):
+        with open(filename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['tick'] + [f"{phase}_us" for phase in self.phases] + ['total_us'])
+            for tick, timings in self.ticks:
+                values = [timings.get(phase, 0.0) * 1e6 for phase in self.phases]
+                writer.writerow([tick] + [f"{value:.1f}" for value in values] + [f"{sum(values):.1f}"])
+        return len(self.ticks)
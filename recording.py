@@ -0,0 +1,151 @@
+import pickle
+from bisect import bisect_right
+from collections import deque
+
+
+# Flux de trames picklées : une image complète (keyframe) périodiquement ou quand la partie
+# recommence, sinon seulement ce qui a changé depuis le tick précédent
+HEADER = ('SWREC', 1)
+KEYFRAME = 'K'
+DELTA = 'D'
+
+
+class EpisodeRecorder:
+    def __init__(self, filename, keyframe_every=500):
+        self.filename = filename
+        self.keyframe_every = keyframe_every
+        self.file = open(filename, 'wb')
+        pickle.dump(HEADER, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.tick = 0
+        self.env = None
+        self.bodies = []
+        self.food = []
+        self.bombs = []
+
+    def record(self, env, snakes, reward=0, score=0):
+        self.tick += 1
+        bodies = [snake.body for snake in snakes]
+        reset = env is not self.env or any(body is not last for body, last in zip(bodies, self.bodies))
+        if reset or len(bodies) != len(self.bodies) or self.tick % self.keyframe_every == 0:
+            frame = self.keyframe(env, bodies, reward, score)
+        else:
+            frame = self.delta(env, bodies, reward, score)
+        pickle.dump(frame, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def keyframe(self, env, bodies, reward, score):
+        self.env = env
+        self.bodies = bodies
+        self.counters = [(body.pushed, body.popped) for body in bodies]
+        self.food = list(env.food_positions)
+        self.bombs = list(env.bomb_positions)
+        state = {
+            'height': env.height,
+            'width': env.width,
+            'walls': list(env.walls),
+            'snakes': [list(body) for body in bodies],
+            'food': list(self.food),
+            'bombs': list(self.bombs),
+        }
+        return KEYFRAME, self.tick, state, reward, score
+
+    def delta(self, env, bodies, reward, score):
+        # Par serpent : nouvelles têtes (de la plus ancienne à la plus récente) et segments retirés en queue
+        snakes = []
+        for i, body in enumerate(bodies):
+            pushed, popped = self.counters[i]
+            heads = tuple(body[j] for j in range(body.pushed - pushed - 1, -1, -1))
+            snakes.append((heads, body.popped - popped))
+            self.counters[i] = (body.pushed, body.popped)
+
+        food = None
+        if env.food_positions != self.food:
+            food = self.changes(self.food, env.food_positions)
+            self.food = list(env.food_positions)
+        bombs = None
+        if env.bomb_positions != self.bombs:
+            bombs = self.changes(self.bombs, env.bomb_positions)
+            self.bombs = list(env.bomb_positions)
+        return DELTA, self.tick, snakes, food, bombs, reward, score
+
+    def changes(self, old, new):
+        changed = [(i, position) for i, position in enumerate(new) if i >= len(old) or old[i] != position]
+        return len(new), changed
+
+    def close(self):
+        self.file.close()
+
+
+class EpisodeReplay:
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        if pickle.load(self.file) != HEADER:
+            raise ValueError(f"{filename} n'est pas un enregistrement Snake Wars")
+
+        # Un seul parcours du fichier pour repérer les keyframes ; une fin tronquée est ignorée
+        self.keyframes = []
+        self.last_tick = 0
+        while True:
+            offset = self.file.tell()
+            try:
+                frame = pickle.load(self.file)
+            except (EOFError, pickle.UnpicklingError):
+                break
+            if frame[0] == KEYFRAME:
+                self.keyframes.append((frame[1], offset))
+            self.last_tick = frame[1]
+        self.keyframe_ticks = [tick for tick, _ in self.keyframes]
+        self.end = offset
+        if not self.keyframes:
+            raise ValueError(f"{filename} ne contient aucune image")
+
+        self.tick = 0
+        self.seek(self.keyframe_ticks[0])
+
+    def seek(self, tick):
+        tick = max(self.keyframe_ticks[0], min(tick, self.last_tick))
+        index = bisect_right(self.keyframe_ticks, tick) - 1
+        self.file.seek(self.keyframes[index][1])
+        self.advance(1)
+        self.advance(tick - self.tick)
+
+    def advance(self, count=1):
+        advanced = 0
+        while advanced < count and self.file.tell() < self.end:
+            self.apply(pickle.load(self.file))
+            advanced += 1
+        return advanced
+
+    def at_end(self):
+        return self.file.tell() >= self.end
+
+    def apply(self, frame):
+        if frame[0] == KEYFRAME:
+            _, self.tick, state, self.reward, self.score = frame
+            self.height = state['height']
+            self.width = state['width']
+            self.walls = state['walls']
+            self.snakes = [deque(body) for body in state['snakes']]
+            self.food = list(state['food'])
+            self.bombs = list(state['bombs'])
+            return
+
+        _, self.tick, snakes, food, bombs, self.reward, self.score = frame
+        for body, (heads, popped) in zip(self.snakes, snakes):
+            for head in heads:
+                body.appendleft(head)
+            for _ in range(popped):
+                body.pop()
+        if food is not None:
+            self.food = self.patch(self.food, food)
+        if bombs is not None:
+            self.bombs = self.patch(self.bombs, bombs)
+
+    def patch(self, positions, changes):
+        length, changed = changes
+        positions = positions[:length] + [None] * (length - len(positions))
+        for i, position in changed:
+            positions[i] = position
+        return positions
+
+    def close(self):
+        self.file.close()
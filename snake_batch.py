@@ -0,0 +1,248 @@
+import argparse
+import time
+
+import numpy as np
+
+from snake_engine import (
+    MAP_WIDTH, MAP_HEIGHT, generate_map,
+    REWARD_FOOD, REWARD_SURVIVAL, REWARD_BOMB,
+    ACTIONS, MOVES,
+    CELL_EMPTY, CELL_WALL, CELL_FOOD, CELL_BOMB, CELL_CODES,
+)
+
+
+# Codes du radar, les mêmes que ceux de ArrayQTable.encode
+RADAR_EMPTY = CELL_CODES[CELL_EMPTY]
+RADAR_WALL = CELL_CODES[CELL_WALL]
+RADAR_FOOD = CELL_CODES[CELL_FOOD]
+RADAR_BOMB = CELL_CODES[CELL_BOMB]
+
+START_POSITION = (1, 1)
+
+
+class BatchEnvironment:
+    def __init__(self, num_envs, map_text=None, num_food=30, num_bombs=10,
+                 max_steps=3000, radar_range=3, seed=None):
+        if map_text is None:
+            map_text = generate_map(MAP_WIDTH, MAP_HEIGHT)
+        rows = map_text.strip().split('\n')
+
+        self.num_envs = num_envs
+        self.height = len(rows)
+        self.width = len(rows[0])
+        self.num_cells = self.height * self.width
+        self.num_food = num_food
+        self.num_bombs = num_bombs
+        self.max_steps = max_steps
+        self.radar_range = radar_range
+        self.rng = np.random.default_rng(seed)
+
+        wall_mask = np.array([[cell == 'x' for cell in row] for row in rows], dtype=np.int8)
+        shape = (num_envs, self.height, self.width)
+        self.walls = np.broadcast_to(wall_mask, shape).copy()
+        self.free_cells = self.num_cells - int(wall_mask.sum())
+        self.food = np.zeros(shape, dtype=np.int8)
+        self.bombs = np.zeros(shape, dtype=np.int8)
+        self.bodies = np.zeros(shape, dtype=np.int16)
+
+        # Vues à plat (K, H*W) partagées avec les couches ci-dessus
+        self._walls = self.walls.reshape(num_envs, -1)
+        self._food = self.food.reshape(num_envs, -1)
+        self._bombs = self.bombs.reshape(num_envs, -1)
+        self._bodies = self.bodies.reshape(num_envs, -1)
+
+        # Corps de chaque serpent : tampon circulaire de cellules, la tête à head_index.
+        # Un serpent peut s'empiler sur lui-même (pas de collision avec son propre corps) et
+        # dépasser le nombre de cases : le tampon est alors agrandi par _grow_capacity
+        self.capacity = self.num_cells + 1
+        self.body_cells = np.zeros((num_envs, self.capacity), dtype=np.int32)
+        self.head_index = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.ones(num_envs, dtype=np.int64)
+        self.heads = np.zeros((num_envs, 2), dtype=np.int64)
+
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.scores = np.zeros(num_envs, dtype=np.float64)
+
+        self.moves = np.array([MOVES[action] for action in ACTIONS], dtype=np.int64)
+        self._rows = np.arange(num_envs)
+
+    def reset(self, indices=None):
+        if indices is None:
+            indices = self._rows
+        indices = np.asarray(indices)
+        if len(indices):
+            self._reset_boards(indices)
+        return self.observe()
+
+    def _reset_boards(self, indices):
+        self.food[indices] = 0
+        self.bombs[indices] = 0
+        self.bodies[indices] = 0
+
+        # Nourriture et bombes sur des cases libres distinctes, comme place_food/place_bombs
+        scores = self.rng.random((len(indices), self.num_cells))
+        scores[self._walls[indices] != 0] = -1
+        count = min(self.num_food + self.num_bombs, self.free_cells)
+        picks = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        rows = indices[:, None]
+        self._food[rows, picks[:, :self.num_food]] = 1
+        self._bombs[rows, picks[:, self.num_food:]] = 1
+
+        start = START_POSITION[0] * self.width + START_POSITION[1]
+        self.head_index[indices] = 0
+        self.length[indices] = 1
+        self.body_cells[indices, 0] = start
+        self._bodies[indices, start] = 1
+        self.heads[indices] = START_POSITION
+
+        self.steps[indices] = 0
+        self.scores[indices] = 0
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = self._rows
+
+        new_heads = self.heads + self.moves[actions]
+        inside = (
+            (new_heads[:, 0] >= 0) & (new_heads[:, 0] < self.height)
+            & (new_heads[:, 1] >= 0) & (new_heads[:, 1] < self.width)
+        )
+        new_cells = np.where(inside, new_heads[:, 0] * self.width + new_heads[:, 1], 0)
+        blocked = ~inside | (self._walls[rows, new_cells] != 0)
+
+        # Mur ou bord : le serpent reste sur place, sans récompense
+        head_cells = self.heads[:, 0] * self.width + self.heads[:, 1]
+        new_cells = np.where(blocked, head_cells, new_cells)
+        new_heads = np.where(blocked[:, None], self.heads, new_heads)
+
+        hit_bomb = ~blocked & (self._bombs[rows, new_cells] != 0)
+        ate_food = ~blocked & ~hit_bomb & (self._food[rows, new_cells] != 0)
+
+        rewards = np.full(self.num_envs, REWARD_SURVIVAL, dtype=np.float32)
+        rewards[blocked] = 0
+        rewards[hit_bomb] = REWARD_BOMB
+        rewards[ate_food] = REWARD_FOOD
+
+        if hit_bomb.any():
+            self._shrink(np.flatnonzero(hit_bomb))
+        if ate_food.any():
+            self._respawn_food(np.flatnonzero(ate_food), new_cells[ate_food])
+
+        self._advance(new_cells, ate_food)
+        self.heads = new_heads
+
+        self.steps += 1
+        self.scores += rewards
+        dones = self.steps >= self.max_steps
+        info = {}
+        if dones.any():
+            done_indices = np.flatnonzero(dones)
+            info["episode_scores"] = self.scores[done_indices].copy()
+            info["done_indices"] = done_indices
+            self._reset_boards(done_indices)
+
+        return self.observe(), rewards, dones, info
+
+    def _advance(self, new_cells, grow):
+        rows = self._rows
+        if self.length.max() >= self.capacity:
+            self._grow_capacity()
+        tail_index = (self.head_index + self.length - 1) % self.capacity
+        keep_tail = ~grow
+        tail_cells = self.body_cells[rows[keep_tail], tail_index[keep_tail]]
+        np.subtract.at(self._bodies, (rows[keep_tail], tail_cells), 1)
+
+        self.head_index = (self.head_index - 1) % self.capacity
+        self.body_cells[rows, self.head_index] = new_cells
+        np.add.at(self._bodies, (rows, new_cells), 1)
+        self.length += grow
+
+    def _grow_capacity(self):
+        # Recopie chaque corps dans l'ordre, de la tête (indice 0) à la queue, dans un tampon deux fois plus grand
+        ring = (self.head_index[:, None] + np.arange(self.capacity)[None, :]) % self.capacity
+        body_cells = np.zeros((self.num_envs, self.capacity * 2), dtype=np.int32)
+        body_cells[:, :self.capacity] = np.take_along_axis(self.body_cells, ring, axis=1)
+        self.body_cells = body_cells
+        self.capacity *= 2
+        self.head_index[:] = 0
+
+    def _shrink(self, indices):
+        lengths = self.length[indices]
+        keep = np.maximum(1, (lengths * 0.5).astype(np.int64))
+        removed = lengths - keep
+        if not removed.any():
+            return
+
+        offsets = np.arange(removed.max())
+        mask = offsets[None, :] < removed[:, None]
+        ring = (self.head_index[indices, None] + keep[:, None] + offsets[None, :]) % self.capacity
+        boards = np.broadcast_to(indices[:, None], ring.shape)[mask]
+        cells = self.body_cells[boards, ring[mask]]
+        np.subtract.at(self._bodies, (boards, cells), 1)
+        self.length[indices] = keep
+
+    def _respawn_food(self, indices, eaten_cells):
+        # Comme Environment.move : la nouvelle nourriture est tirée avant de libérer la case
+        # mangée, hors des corps (la case mangée, où arrive la tête, est encore occupée)
+        occupied = (
+            (self._walls[indices] != 0) | (self._food[indices] != 0)
+            | (self._bombs[indices] != 0) | (self._bodies[indices] != 0)
+        )
+        scores = self.rng.random((len(indices), self.num_cells))
+        scores[occupied] = -1
+        picks = scores.argmax(axis=1)
+        free = scores[np.arange(len(indices)), picks] >= 0
+        self._food[indices, eaten_cells] = 0
+        self._food[indices[free], picks[free]] = 1
+
+    def radar(self):
+        steps = np.arange(1, self.radar_range + 1)
+        # (K, 4 directions, R pas, 2)
+        coords = self.heads[:, None, None, :] + self.moves[None, :, None, :] * steps[None, None, :, None]
+        x, y = coords[..., 0], coords[..., 1]
+        inside = (x >= 0) & (x < self.height) & (y >= 0) & (y < self.width)
+        cells = np.where(inside, x * self.width + y, 0)
+        rows = self._rows[:, None, None]
+
+        codes = np.full(cells.shape, RADAR_WALL, dtype=np.int8)
+        inner = np.where(
+            self._walls[rows, cells] != 0, RADAR_WALL,
+            np.where(
+                self._food[rows, cells] != 0, RADAR_FOOD,
+                np.where(self._bombs[rows, cells] != 0, RADAR_BOMB, RADAR_EMPTY),
+            ),
+        )
+        codes[inside] = inner[inside]
+
+        hit = codes != RADAR_EMPTY
+        first = hit.argmax(axis=2)
+        return np.take_along_axis(codes, first[..., None], axis=2)[..., 0]
+
+    def observe(self):
+        return np.concatenate([self.heads, self.radar()], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de BatchEnvironment avec des actions aléatoires")
+    parser.add_argument("--envs", type=int, default=256)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=MAP_WIDTH)
+    parser.add_argument("--height", type=int, default=MAP_HEIGHT)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    env = BatchEnvironment(args.envs, generate_map(args.width, args.height), seed=args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        env.step(rng.integers(0, len(ACTIONS), size=args.envs))
+    elapsed = time.perf_counter() - start
+
+    samples = args.envs * args.steps
+    print(f"{samples} transitions en {elapsed:.2f}s ({samples / elapsed:.0f} transitions/s)")
+
+
+if __name__ == "__main__":
+    main()
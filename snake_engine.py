@@ -0,0 +1,829 @@
+import random
+import pickle
+from collections import deque
+
+import numpy as np
+
+from checkpoint import CheckpointFile, is_checkpoint, write_pickle
+from telemetry import noop
+
+
+MAP_WIDTH = 30
+MAP_HEIGHT = 25
+
+def generate_map(width, height):
+    map_data = ["x" * width]
+    for _ in range(height - 2):
+        map_data.append("x" + "." * (width - 2) + "x")
+    map_data.append("x" * width)
+    return "\n".join(map_data)
+
+
+REWARD_FOOD = 100
+REWARD_SURVIVAL = -1
+REWARD_BOMB = -100
+
+REWARD_KILL = 1000
+REWARD_DIE = -1000
+
+ACTION_UP = 'U'
+ACTION_DOWN = 'D'
+ACTION_LEFT = 'L'
+ACTION_RIGHT = 'R'
+ACTIONS = [ACTION_UP, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT]
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+MOVES = {
+    ACTION_UP: (-1, 0),
+    ACTION_DOWN: (1, 0),
+    ACTION_LEFT: (0, -1),
+    ACTION_RIGHT: (0, 1)
+}
+
+# Directions du radar : les 4 déplacements, plus les diagonales en mode 8 directions
+RADAR_DIAGONALS = {
+    'UP_LEFT': (-1, -1),
+    'UP_RIGHT': (-1, 1),
+    'DOWN_LEFT': (1, -1),
+    'DOWN_RIGHT': (1, 1),
+}
+RADAR_DIRECTIONS = {
+    4: dict(MOVES),
+    8: {**MOVES, **RADAR_DIAGONALS},
+}
+
+CELL_EMPTY = 'EMPTY'
+CELL_WALL = 'WALL'
+CELL_FOOD = 'FOOD'
+CELL_BOMB = 'BOMB'
+# Ordre des codes du radar, commun avec snake_batch
+CELL_TYPES = [CELL_EMPTY, CELL_WALL, CELL_FOOD, CELL_BOMB]
+CELL_CODES = {cell: code for code, cell in enumerate(CELL_TYPES)}
+
+FILE_AGENT = 'snake.qtable'
+
+def arg_max(table):
+    if not table:
+        return random.choice(ACTIONS)
+    return max(table, key=table.get)
+
+class QTable:
+    def __init__(self, learning_rate=0.9, discount_factor=0.95, epsilon=0.5):
+        self.table = {}
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.epsilon = epsilon
+
+    def update_epsilon(self, decay_rate=0.995, min_epsilon=0.1):
+        self.epsilon = max(min_epsilon, self.epsilon * decay_rate)
+
+    def observe(self, env, head):
+        return head, tuple(env.get_radar(head).values())
+
+    def set(self, state, action, reward, new_state):
+        state = tuple(state)
+        new_state = tuple(new_state)
+
+        if state not in self.table:
+            self.table[state] = {action: 0 for action in ACTIONS}
+        if new_state not in self.table:
+            self.table[new_state] = {action: 0 for action in ACTIONS}
+
+        max_future_q = max(self.table[new_state].values(), default=0)
+        self.table[state][action] += self.learning_rate * (reward + self.discount_factor * max_future_q - self.table[state][action])
+        #print(f"État : {state}, Action : {action}, Valeur Q mise à jour : {self.table[state][action]}")
+
+    def best_action(self, state):
+        if random.random() < self.epsilon:
+            return random.choice(ACTIONS)
+        else:
+            if state in self.table and self.table[state]:
+                action = arg_max(self.table[state])
+            else:
+                action = random.choice(ACTIONS)
+        return action
+
+    def save(self, filename, saver=None):
+        if saver is None:
+            write_pickle(filename, self.table)
+        else:
+            # Copie des valeurs pour que l'écriture en arrière-plan reste cohérente
+            snapshot = {state: dict(values) for state, values in self.table.items()}
+            saver.submit(write_pickle, filename, snapshot)
+
+    def load(self, filename):
+        # Le même fichier peut contenir un checkpoint binaire d'ArrayQTable (snake_wars, snake_trainer)
+        if is_checkpoint(filename):
+            raise ValueError(f"{filename} contient un checkpoint de la table dense (ArrayQTable), "
+                             f"pas une QTable dictionnaire")
+        with open(filename, 'rb') as file:
+            self.table = pickle.load(file)
+
+    def __len__(self):
+        return len(self.table)
+
+
+def table_states(height, width, num_directions=4):
+    # Taille d'ArrayQTable : un état par case et par radar codé en base 4
+    return height * width * len(CELL_TYPES) ** num_directions
+
+
+class ArrayQTable:
+    def __init__(self, height=MAP_HEIGHT, width=MAP_WIDTH, learning_rate=0.9, discount_factor=0.95,
+                 epsilon=0.5, num_directions=len(ACTIONS), q=None, visited=None, dirty=None):
+        self.height = height
+        self.width = width
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.epsilon = epsilon
+        self.num_directions = num_directions
+
+        # Radar codé en base 4, dans l'ordre de CELL_TYPES (voir Environment.get_radar_code)
+        self.radar_states = len(CELL_TYPES) ** num_directions
+        self.num_states = table_states(height, width, num_directions)
+        # q, visited et dirty peuvent être fournis, par exemple en mémoire partagée
+        if q is None:
+            q = np.zeros((self.num_states, len(ACTIONS)), dtype=np.float32)
+        if visited is None:
+            visited = np.zeros(self.num_states, dtype=bool)
+        if dirty is None:
+            dirty = np.zeros(self.num_states, dtype=bool)
+        self.allocate(q, visited, dirty)
+        self.checkpoint = None
+
+    def allocate(self, q, visited, dirty):
+        self.q = q
+        self.visited = visited
+        # États modifiés depuis la dernière sauvegarde
+        self.dirty = dirty
+        # Vues memoryview : l'accès élément par élément reste en flottants Python
+        self.values = memoryview(q.reshape(-1))
+        self.seen = memoryview(visited)
+        self.touched = memoryview(dirty)
+        self.recount()
+
+    def recount(self):
+        # Nombre d'états visités, tenu à jour par set ; à recalculer si visited est modifié
+        # ailleurs (apprentissage par lots, autres processus en mémoire partagée)
+        self.visited_count = int(np.count_nonzero(self.visited))
+        return self.visited_count
+
+    def observe(self, env, head):
+        # Les états de cette table sont des entiers : le code du radar est mis en cache par l'environnement
+        return (head[0] * self.width + head[1]) * self.radar_states + env.get_radar_code(head)
+
+    def encode(self, state):
+        # État (tête, radar) de QTable -> entier de cette table
+        head, radar = state
+        code = 0
+        for cell in radar:
+            code = code * len(CELL_TYPES) + CELL_CODES[cell]
+        return (head[0] * self.width + head[1]) * self.radar_states + code
+
+    def update_epsilon(self, decay_rate=0.995, min_epsilon=0.1):
+        self.epsilon = max(min_epsilon, self.epsilon * decay_rate)
+
+    def set(self, state_id, action, reward, new_state_id):
+        values = self.values
+        seen = self.seen
+        if not seen[state_id]:
+            seen[state_id] = True
+            self.visited_count += 1
+        if not seen[new_state_id]:
+            seen[new_state_id] = True
+            self.visited_count += 1
+
+        base = new_state_id * 4
+        max_future_q = max(values[base], values[base + 1], values[base + 2], values[base + 3])
+        idx = state_id * 4 + ACTION_INDEX[action]
+        values[idx] += self.learning_rate * (reward + self.discount_factor * max_future_q - values[idx])
+        # Marqué après l'écriture : une sauvegarde concurrente (Hogwild) qui remet dirty à zéro
+        # entre les deux reverra cet état à la suivante
+        self.touched[state_id] = True
+        self.touched[new_state_id] = True
+
+    def best_action(self, state_id):
+        if random.random() < self.epsilon:
+            return random.choice(ACTIONS)
+        if not self.seen[state_id]:
+            return random.choice(ACTIONS)
+
+        values = self.values
+        base = state_id * 4
+        best = 0
+        for i in range(1, 4):
+            if values[base + i] > values[base + best]:
+                best = i
+        return ACTIONS[best]
+
+    def save(self, filename, saver=None):
+        if self.checkpoint is None or self.checkpoint.filename != filename:
+            self.checkpoint = CheckpointFile(filename)
+        snapshot = self.checkpoint.snapshot(self.q, self.visited, self.dirty)
+        if saver is None:
+            self.checkpoint.write(snapshot)
+        else:
+            saver.submit(self.checkpoint.write, snapshot)
+
+    def load(self, filename):
+        self.q[:] = 0
+        self.visited[:] = False
+        self.dirty[:] = False
+        if is_checkpoint(filename):
+            self.checkpoint = CheckpointFile(filename)
+            self.checkpoint.load(self.q, self.visited)
+        else:
+            # Ancien format : dict picklé de QTable, converti ; la prochaine sauvegarde le réécrit en checkpoint
+            with open(filename, 'rb') as file:
+                table = pickle.load(file)
+            if not isinstance(table, dict):
+                raise ValueError(f"{filename} n'est ni une sauvegarde ArrayQTable ni une QTable picklée")
+            self.load_table(table, filename)
+            self.checkpoint = None
+        self.recount()
+
+    def load_table(self, table, filename):
+        for state, values in table.items():
+            head, radar = state
+            if (not (0 <= head[0] < self.height and 0 <= head[1] < self.width)
+                    or len(radar) != self.num_directions or any(cell not in CELL_CODES for cell in radar)):
+                raise ValueError(
+                    f"{filename} : l'état {state} ne correspond pas à une carte {self.width}x{self.height} "
+                    f"avec un radar à {self.num_directions} directions"
+                )
+            state_id = self.encode(state)
+            self.q[state_id] = [values.get(action, 0) for action in ACTIONS]
+            self.visited[state_id] = True
+
+    def __len__(self):
+        return self.visited_count
+
+class SnakeBody:
+    def __init__(self, start_position):
+        self.segments = deque([start_position])
+        # Nombre de segments par case, un serpent pouvant repasser sur lui-même
+        self.counts = {start_position: 1}
+        # Compteurs cumulés, pour qu'un affichage rattrape les changements sans tout relire
+        self.pushed = 0
+        self.popped = 0
+
+    def push_head(self, position):
+        self.segments.appendleft(position)
+        self.counts[position] = self.counts.get(position, 0) + 1
+        self.pushed += 1
+
+    def pop_tail(self):
+        position = self.segments.pop()
+        self.popped += 1
+        count = self.counts[position] - 1
+        if count:
+            self.counts[position] = count
+        else:
+            del self.counts[position]
+        return position
+
+    def truncate(self, length):
+        removed = []
+        while len(self.segments) > length:
+            removed.append(self.pop_tail())
+        return removed
+
+    def occupies(self, position, skip_head=False):
+        count = self.counts.get(position, 0)
+        if skip_head and position == self.segments[0]:
+            count -= 1
+        return count > 0
+
+    def __contains__(self, position):
+        return position in self.counts
+
+    def __getitem__(self, index):
+        return self.segments[index]
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __repr__(self):
+        return f"SnakeBody({list(self.segments)})"
+
+
+class BaseSnake:
+    def __init__(self, start_position):
+        self.body = SnakeBody(start_position)
+        self.grow = False
+        self.env = None
+
+    def reset(self, start_position):
+        self.body = SnakeBody(start_position)
+        self.grow = False
+
+    def move(self, new_head):
+        self.body.push_head(new_head)
+        if self.env:
+            self.env.occupy(new_head)
+        if self.grow:
+            self.grow = False
+        else:
+            tail = self.body.pop_tail()
+            if self.env:
+                self.env.release(tail)
+
+    def reduce_body(self, percentage):
+        if len(self.body) > 1:
+            segments_to_keep = max(1, int(len(self.body) * (1 - percentage)))
+            for segment in self.body.truncate(segments_to_keep):
+                if self.env:
+                    self.env.release(segment)
+
+
+class Snake(BaseSnake):
+    def __init__(self, start_position, qtable):
+        super().__init__(start_position)
+        self.qtable = qtable
+        self.total_reward = 0
+
+    def decide_action(self, state):
+        return self.qtable.best_action(state)
+
+    def update_qtable(self, state, action, reward, new_state):
+        self.qtable.set(state, action, reward, new_state)
+
+class ScriptedSnake(BaseSnake):
+    def decide_action(self, env):
+        # Descente de gradient sur la distance à la nourriture, en évitant les corps
+        head = self.body[0]
+        field = env.distance_field()
+
+        best_action = None
+        best_distance = UNREACHABLE
+        free_actions = []
+        safe_actions = []
+        for action, (dx, dy) in MOVES.items():
+            next_position = (head[0] + dx, head[1] + dy)
+
+            if env.cell_at(next_position) in (CELL_WALL, CELL_BOMB):
+                continue
+            safe_actions.append(action)
+            if next_position in env.body_counts:
+                continue
+            free_actions.append(action)
+            distance = field.distance(next_position)
+            if distance < best_distance:
+                best_action = action
+                best_distance = distance
+
+        if best_action is not None:
+            return best_action
+        return random.choice(free_actions or safe_actions or ACTIONS)
+
+
+def observe(env, snake):
+    # Chaque QTable choisit la forme de ses états : tuple (tête, radar) ou entier
+    return snake.qtable.observe(env, snake.body[0])
+
+
+def check_collision(snake, scripted_snake):
+    # Sur les positions après déplacement : têtes dans la même case sans effet,
+    # sinon la tête qui entre dans le corps de l'autre perd
+    snake_head = snake.body[0]
+    scripted_snake_head = scripted_snake.body[0]
+
+    if snake_head == scripted_snake_head:
+        return 0
+    if scripted_snake.body.occupies(snake_head, skip_head=True):
+        return REWARD_DIE
+    if snake.body.occupies(scripted_snake_head, skip_head=True):
+        return REWARD_KILL
+    return 0
+
+
+def duel_step(env, snake, scripted_snake, action, mark=noop):
+    # Un tick du duel, commun à snake_trainer et snake_wars : le serpent bouge, les collisions
+    # sont vérifiées, puis le serpent scripté joue si la partie continue.
+    # Renvoie (nouvel état, récompense, collision) ; collision vaut REWARD_DIE, REWARD_KILL ou 0.
+    # mark(phase) est appelé après chaque phase (PhaseProfiler.mark dans la fenêtre).
+    new_head, reward = env.move(snake, action)
+    snake.move(new_head)
+    mark('move')
+    new_state = observe(env, snake)
+    mark('radar')
+    collision = check_collision(snake, scripted_snake)
+    mark('collision')
+    if collision:
+        return new_state, collision, collision
+
+    scripted_action = scripted_snake.decide_action(env)
+    scripted_new_head, _ = env.move(scripted_snake, scripted_action)
+    scripted_snake.move(scripted_new_head)
+    mark('scripted')
+    return new_state, reward, 0
+
+
+UNREACHABLE = 1 << 30
+
+
+class DistanceField:
+    # Distance de chaque case à la nourriture la plus proche (BFS multi-source).
+    # Murs et bombes bloquent ; les corps bougent à chaque tick et sont évités au moment du choix.
+    # La grille est bordée d'une case bloquée pour se passer des tests de limites.
+    def __init__(self, env):
+        self.stride = env.width + 2
+        size = (env.height + 2) * self.stride
+        self.passable = bytearray(size)
+        for x in range(env.height):
+            start = (x + 1) * self.stride + 1
+            self.passable[start:start + env.width] = b'\x01' * env.width
+        for position, cell in env.cells.items():
+            if cell in (CELL_WALL, CELL_BOMB):
+                self.passable[self.index(position)] = 0
+        self.offsets = (-self.stride, self.stride, -1, 1)
+        self.build([self.index(position) for position in env.food_positions])
+
+    def build(self, sources):
+        # Construction complète (à chaque nouvelle carte) : BFS par fronts entiers en NumPy.
+        # Les réparations après chaque nourriture mangée restent en Python, case par case.
+        passable = np.frombuffer(self.passable, dtype=np.uint8) != 0
+        offsets = np.array(self.offsets)
+        dist = np.full(len(passable), UNREACHABLE, dtype=np.int64)
+        # Source (indice de la nourriture) dont chaque case tient sa distance
+        owner = np.full(len(passable), -1, dtype=np.int64)
+        frontier = np.unique(np.array(sources, dtype=np.int64))
+        dist[frontier] = 0
+        owner[frontier] = frontier
+        distance = 0
+        while len(frontier):
+            distance += 1
+            neighbors = (frontier[:, None] + offsets[None, :]).ravel()
+            owners = np.repeat(owner[frontier], len(offsets))
+            new = passable[neighbors] & (dist[neighbors] == UNREACHABLE)
+            # Une case atteinte par plusieurs voisins du front garde la source du premier
+            frontier, first = np.unique(neighbors[new], return_index=True)
+            dist[frontier] = distance
+            owner[frontier] = owners[new][first]
+        self.dist = dist.tolist()
+        self.owner = owner.tolist()
+
+    def index(self, position):
+        return (position[0] + 1) * self.stride + position[1] + 1
+
+    def distance(self, position):
+        return self.dist[self.index(position)]
+
+    def propagate(self, queue):
+        dist, owner, passable, offsets = self.dist, self.owner, self.passable, self.offsets
+        while queue:
+            cell = queue.popleft()
+            next_distance = dist[cell] + 1
+            cell_owner = owner[cell]
+            for offset in offsets:
+                neighbor = cell + offset
+                if passable[neighbor] and next_distance < dist[neighbor]:
+                    dist[neighbor] = next_distance
+                    owner[neighbor] = cell_owner
+                    queue.append(neighbor)
+
+    def add_source(self, position):
+        source = self.index(position)
+        self.dist[source] = 0
+        self.owner[source] = source
+        self.propagate(deque([source]))
+
+    def remove_source(self, position):
+        dist, owner, offsets = self.dist, self.owner, self.offsets
+        source = self.index(position)
+        if owner[source] != source:
+            return
+
+        # Les cases rattachées à cette source forment une région connexe : on la vide...
+        region = [source]
+        owner[source] = -1
+        for cell in region:
+            for offset in offsets:
+                neighbor = cell + offset
+                if owner[neighbor] == source:
+                    owner[neighbor] = -1
+                    region.append(neighbor)
+        for cell in region:
+            dist[cell] = UNREACHABLE
+
+        # ...puis on la remplit depuis sa frontière, dont les distances restent justes
+        seeds = []
+        for cell in region:
+            for offset in offsets:
+                neighbor = cell + offset
+                if dist[neighbor] + 1 < dist[cell]:
+                    dist[cell] = dist[neighbor] + 1
+                    owner[cell] = owner[neighbor]
+            if dist[cell] < UNREACHABLE:
+                seeds.append(cell)
+        seeds.sort(key=dist.__getitem__)
+        self.propagate(deque(seeds))
+
+
+class CellPool:
+    def __init__(self, cells=()):
+        self.cells = []
+        self.index = {}
+        for cell in cells:
+            self.add(cell)
+
+    def add(self, cell):
+        if cell not in self.index:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        idx = self.index.pop(cell, None)
+        if idx is None:
+            return
+        last = self.cells.pop()
+        if idx < len(self.cells):
+            self.cells[idx] = last
+            self.index[last] = idx
+
+    def sample(self):
+        return random.choice(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.index
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class Environment:
+    def __init__(self, map_text, num_food=30, num_bombs=10, radar_range=3, radar_directions=4):
+        self.map = [list(row) for row in map_text.strip().split('\n')]
+        self.height = len(self.map)
+        self.width = len(self.map[0])
+        self.radar_range = radar_range
+        self.radar_directions = radar_directions
+        self.directions = RADAR_DIRECTIONS[radar_directions]
+        # Radar déjà calculé par case, invalidé autour de chaque case qui change ;
+        # radar_codes (sous-ensemble de radar_cache) le garde aussi codé en base 4
+        self.radar_cache = {}
+        self.radar_codes = {}
+        # Créé au premier besoin d'un serpent scripté, puis tenu à jour
+        self.food_field = None
+        # Index des cases occupées : position -> CELL_WALL / CELL_FOOD / CELL_BOMB
+        self.cells = {}
+        # Nombre de segments de serpent par case
+        self.body_counts = {}
+        self.walls = self.create_walls()
+        self.free_cells = CellPool(
+            (row_idx, col_idx)
+            for row_idx, row in enumerate(self.map)
+            for col_idx, cell in enumerate(row)
+            if cell == '.'
+        )
+        self.food_positions = self.place_food(num_food)
+        self.mark_cells(self.food_positions, CELL_FOOD)
+        self.food_index = {position: i for i, position in enumerate(self.food_positions)}
+        # Indices de food_positions modifiés depuis le dernier affichage (au plus num_food)
+        self.dirty_food = set()
+        self.bomb_positions = self.place_bombs(num_bombs)
+        self.mark_cells(self.bomb_positions, CELL_BOMB)
+
+    def create_walls(self):
+        walls = []
+        for row_idx, row in enumerate(self.map):
+            for col_idx, cell in enumerate(row):
+                if cell == 'x':
+                    walls.append((row_idx, col_idx))
+        self.mark_cells(walls, CELL_WALL)
+        return walls
+
+    def mark_cells(self, positions, cell):
+        for position in positions:
+            self.cells[position] = cell
+
+    def cell_at(self, position):
+        x, y = position
+        if x < 0 or x >= self.height or y < 0 or y >= self.width:
+            return CELL_WALL
+        return self.cells.get(position, CELL_EMPTY)
+
+    def add_food(self, position):
+        self.food_index[position] = len(self.food_positions)
+        self.dirty_food.add(len(self.food_positions))
+        self.food_positions.append(position)
+        self.cells[position] = CELL_FOOD
+        self.free_cells.discard(position)
+        self.invalidate_radar(position)
+        if self.food_field is not None:
+            self.food_field.add_source(position)
+
+    def remove_food(self, position):
+        # Le dernier élément prend la place de celui retiré
+        index = self.food_index.pop(position)
+        last = self.food_positions.pop()
+        self.dirty_food.add(len(self.food_positions))
+        if index < len(self.food_positions):
+            self.food_positions[index] = last
+            self.food_index[last] = index
+            self.dirty_food.add(index)
+        self.free_food_cell(position)
+        if self.food_field is not None:
+            self.food_field.remove_source(position)
+
+    def replace_food(self, position, new_position):
+        index = self.food_index.pop(position)
+        self.food_positions[index] = new_position
+        self.food_index[new_position] = index
+        self.dirty_food.add(index)
+        self.cells[new_position] = CELL_FOOD
+        self.free_cells.discard(new_position)
+        self.invalidate_radar(new_position)
+        self.free_food_cell(position)
+        if self.food_field is not None:
+            self.food_field.add_source(new_position)
+            self.food_field.remove_source(position)
+
+    def free_food_cell(self, position):
+        del self.cells[position]
+        self.invalidate_radar(position)
+        if position not in self.body_counts:
+            self.free_cells.add(position)
+
+    def distance_field(self):
+        if self.food_field is None:
+            self.food_field = DistanceField(self)
+        return self.food_field
+
+    def attach(self, snake):
+        snake.env = self
+        for segment in snake.body:
+            self.occupy(segment)
+
+    def occupy(self, position):
+        self.body_counts[position] = self.body_counts.get(position, 0) + 1
+        self.free_cells.discard(position)
+
+    def release(self, position):
+        count = self.body_counts.get(position, 0) - 1
+        if count > 0:
+            self.body_counts[position] = count
+            return
+        self.body_counts.pop(position, None)
+        if position not in self.cells and self.map[position[0]][position[1]] == '.':
+            self.free_cells.add(position)
+
+    def place_food(self, num_food):
+        return self.place_items(num_food)
+
+    def place_bombs(self, num_bombs):
+        return self.place_items(num_bombs)
+
+    def place_items(self, num_items):
+        positions = []
+        while len(positions) < num_items and self.free_cells:
+            pos = self.free_cells.sample()
+            self.free_cells.discard(pos)
+            positions.append(pos)
+        return positions
+
+    def get_game_state(self):
+        return {
+            "walls": self.walls,
+            "food": self.food_positions,
+            "bombs": self.bomb_positions,
+        }
+    '''
+    def get_extended_radar(self, head, scripted_positions):
+        directions = {
+            "UP": (-1, 0), "DOWN": (1, 0), "LEFT": (0, -1), "RIGHT": (0, 1),
+            "UP_LEFT": (-1, -1), "UP_RIGHT": (-1, 1), "DOWN_LEFT": (1, -1), "DOWN_RIGHT": (1, 1),
+        }
+        radar = {}
+
+        # Set pour vérification rapide
+        scripted_positions_set = set(scripted_positions)
+
+        for direction, (dx, dy) in directions.items():
+            x, y = head
+            radar[direction] = []
+            for step in range(1, 6):
+                x += dx
+                y += dy
+                position = (x, y)
+                if position in scripted_positions_set:
+                    radar[direction].append("SNAKE")
+                    break
+                elif position in self.walls:
+                    radar[direction].append("WALL")
+                    break
+                elif position in self.food_positions:
+                    radar[direction].append("FOOD")
+                    break
+                elif position in self.bomb_positions:
+                    radar[direction].append("BOMB")
+                    break
+                elif x < 0 or x >= self.height or y < 0 or y >= self.width:
+                    radar[direction].append("WALL")
+                    break
+                else:
+                    radar[direction].append("EMPTY")
+
+        return {dir: signals[0] if signals else "EMPTY" for dir, signals in radar.items()}
+
+    '''
+    # Radar de la case, calculé une fois puis servi depuis radar_cache
+    def get_radar(self, head):
+        # Le dict renvoyé est partagé avec le cache : ne pas le modifier
+        radar = self.radar_cache.get(head)
+        if radar is None:
+            radar = self.compute_radar(head)
+            self.radar_cache[head] = radar
+        return radar
+
+    def get_radar_code(self, head):
+        code = self.radar_codes.get(head)
+        if code is None:
+            code = 0
+            for cell in self.get_radar(head).values():
+                code = code * len(CELL_TYPES) + CELL_CODES[cell]
+            self.radar_codes[head] = code
+        return code
+
+    def compute_radar(self, head):
+        radar = {}
+        for action, (dx, dy) in self.directions.items():
+            x, y = head
+            for _ in range(self.radar_range):
+                x += dx
+                y += dy
+                cell = self.cell_at((x, y))
+                radar[action] = cell
+                if cell != CELL_EMPTY:
+                    break
+        return radar
+
+    def invalidate_radar(self, position):
+        # Seules les cases dont un rayon passe par position voient leur radar changer
+        cache = self.radar_cache
+        if not cache:
+            return
+        codes = self.radar_codes
+        x, y = position
+        for dx, dy in self.directions.values():
+            for step in range(1, self.radar_range + 1):
+                cache.pop((x - dx * step, y - dy * step), None)
+                codes.pop((x - dx * step, y - dy * step), None)
+    '''
+    def get_immediate_neighbors(self, head):
+        neighbors = {}
+        directions = {
+            "UP": (-1, 0),
+            "DOWN": (1, 0),
+            "LEFT": (0, -1),
+            "RIGHT": (0, 1),
+            "UP_LEFT": (-1, -1),
+            "UP_RIGHT": (-1, 1),
+            "DOWN_LEFT": (1, -1),
+            "DOWN_RIGHT": (1, 1),
+        }
+
+        for direction, (dx, dy) in directions.items():
+            x, y = head[0] + dx, head[1] + dy
+
+            if x < 0 or x >= self.height or y < 0 or y >= self.width:
+                neighbors[direction] = "WALL"
+            elif (x, y) in self.walls:
+                neighbors[direction] = "WALL"
+            elif (x, y) in self.food_positions:
+                neighbors[direction] = "FOOD"
+            elif (x, y) in self.bomb_positions:
+                neighbors[direction] = "BOMB"
+            else:
+                neighbors[direction] = "EMPTY"
+
+        return neighbors
+    '''
+    def move(self, snake, action):
+        move = MOVES[action]
+        new_head = (snake.body[0][0] + move[0], snake.body[0][1] + move[1])
+
+        cell = self.cell_at(new_head)
+
+        if cell == CELL_WALL:
+            return snake.body[0], 0
+
+        if cell == CELL_BOMB:
+            snake.reduce_body(0.5)
+            return new_head, REWARD_BOMB
+
+        if cell == CELL_FOOD:
+            # La nouvelle nourriture est tirée avant de libérer la case mangée,
+            # puis prend sa place dans food_positions
+            positions = self.place_food(1)
+            if positions:
+                self.replace_food(new_head, positions[0])
+            else:
+                self.remove_food(new_head)
+            snake.grow = True
+            return new_head, REWARD_FOOD
+
+        return new_head, REWARD_SURVIVAL
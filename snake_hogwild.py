@@ -0,0 +1,214 @@
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from checkpoint import BackgroundSaver
+from snake_engine import MAP_WIDTH, MAP_HEIGHT, FILE_AGENT, ACTIONS, ArrayQTable, table_states
+from snake_trainer import Trainer, MAX_EPISODE_STEPS
+
+
+def shared_arrays(handles, height, width):
+    q_shm, visited_shm, dirty_shm = handles
+    count = table_states(height, width)
+    q = np.ndarray((count, len(ACTIONS)), dtype=np.float32, buffer=q_shm.buf)
+    visited = np.ndarray(count, dtype=bool, buffer=visited_shm.buf)
+    dirty = np.ndarray(count, dtype=bool, buffer=dirty_shm.buf)
+    return q, visited, dirty
+
+
+def attach_qtable(names, height, width):
+    handles = [shared_memory.SharedMemory(name=name) for name in names]
+    q, visited, dirty = shared_arrays(handles, height, width)
+    qtable = ArrayQTable(height, width, q=q, visited=visited, dirty=dirty)
+    return qtable, handles
+
+
+def detach_qtable(qtable):
+    # Les vues sur la mémoire partagée doivent disparaître avant SharedMemory.close()
+    qtable.allocate(qtable.q.copy(), qtable.visited.copy(), qtable.dirty.copy())
+
+
+def worker_main(worker_id, names, height, width, max_steps,
+                epsilon, stop_event, stats_queue, seed):
+    random.seed(None if seed is None else seed + worker_id)
+    qtable, handles = attach_qtable(names, height, width)
+    trainer = Trainer(qtable, width, height, max_steps)
+
+    try:
+        while not stop_event.is_set():
+            # Epsilon est piloté par le coordinateur, pas par le worker
+            qtable.epsilon = epsilon.value
+            steps = trainer.total_steps
+            score = trainer.run_episode()
+            stats_queue.put((worker_id, score, trainer.total_steps - steps))
+    finally:
+        detach_qtable(qtable)
+        for handle in handles:
+            handle.close()
+
+
+class HogwildCoordinator:
+    def __init__(self, num_workers, map_width=MAP_WIDTH, map_height=MAP_HEIGHT,
+                 max_steps=MAX_EPISODE_STEPS, epsilon=0.5, seed=None):
+        self.num_workers = num_workers
+        self.map_width = map_width
+        self.map_height = map_height
+        self.max_steps = max_steps
+        self.seed = seed
+
+        count = table_states(map_height, map_width)
+        self.handles = [
+            shared_memory.SharedMemory(create=True, size=count * len(ACTIONS) * 4),
+            shared_memory.SharedMemory(create=True, size=count),
+            shared_memory.SharedMemory(create=True, size=count),
+        ]
+        q, visited, dirty = shared_arrays(self.handles, map_height, map_width)
+        q[:] = 0
+        visited[:] = False
+        dirty[:] = False
+        self.qtable = ArrayQTable(map_height, map_width, epsilon=epsilon, q=q, visited=visited, dirty=dirty)
+
+        self.epsilon = mp.Value('d', epsilon, lock=False)
+        self.stop_event = mp.Event()
+        self.stats_queue = mp.Queue()
+        self.workers = []
+        self.saver = BackgroundSaver()
+
+        self.total_episodes = 0
+        self.total_steps = 0
+        # Scores des derniers épisodes, pour le score moyen
+        self.recent_scores = deque(maxlen=100)
+
+    def load(self, filename):
+        self.qtable.load(filename)
+
+    def start(self):
+        for worker_id in range(self.num_workers):
+            worker = mp.Process(
+                target=worker_main,
+                args=(worker_id, [handle.name for handle in self.handles],
+                      self.map_height, self.map_width, self.max_steps,
+                      self.epsilon, self.stop_event, self.stats_queue, self.seed),
+                daemon=True,
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def train(self, episodes, save_every=0, filename=FILE_AGENT, report_every=10):
+        start = time.perf_counter()
+        self.start()
+        try:
+            while self.total_episodes < episodes:
+                try:
+                    _, score, steps = self.stats_queue.get(timeout=1)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in self.workers):
+                        raise RuntimeError("Tous les workers se sont arrêtés")
+                    continue
+
+                self.total_episodes += 1
+                self.total_steps += steps
+                self.recent_scores.append(score)
+
+                self.qtable.update_epsilon()
+                self.epsilon.value = self.qtable.epsilon
+
+                if save_every and self.total_episodes % save_every == 0:
+                    self.qtable.save(filename, self.saver)
+                if report_every and self.total_episodes % report_every == 0:
+                    self.report(start)
+        finally:
+            self.stop()
+
+        if save_every:
+            self.qtable.save(filename, self.saver)
+            self.saver.flush()
+        return self.stats(start)
+
+    def stop(self):
+        self.stop_event.set()
+        deadline = time.time() + 30
+        while any(worker.is_alive() for worker in self.workers) and time.time() < deadline:
+            # Vider la file pour que les workers puissent se terminer
+            try:
+                self.stats_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for worker in self.workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+
+    def close(self):
+        self.saver.close()
+        detach_qtable(self.qtable)
+        for handle in self.handles:
+            handle.close()
+            handle.unlink()
+
+    def stats(self, start):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        recent = self.recent_scores
+        return {
+            "workers": self.num_workers,
+            "episodes": self.total_episodes,
+            "steps": self.total_steps,
+            "elapsed": elapsed,
+            "steps_per_sec": self.total_steps / elapsed,
+            "episodes_per_sec": self.total_episodes / elapsed,
+            "mean_score": sum(recent) / len(recent) if recent else 0,
+            "epsilon": self.qtable.epsilon,
+            # Les workers marquent les états visités dans la mémoire partagée
+            "states": self.qtable.recount(),
+        }
+
+    def report(self, start):
+        stats = self.stats(start)
+        print(
+            f"Épisode {stats['episodes']} | score moyen {stats['mean_score']:.0f} | "
+            f"{stats['steps_per_sec']:.0f} pas/s | {stats['episodes_per_sec']:.2f} épisodes/s | "
+            f"epsilon {stats['epsilon']:.3f} | états {stats['states']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement Hogwild multi-processus de Snake Wars")
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=MAX_EPISODE_STEPS)
+    parser.add_argument("--width", type=int, default=MAP_WIDTH)
+    parser.add_argument("--height", type=int, default=MAP_HEIGHT)
+    parser.add_argument("--save-every", type=int, default=100)
+    parser.add_argument("--report-every", type=int, default=50)
+    parser.add_argument("--file", default=FILE_AGENT)
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    coordinator = HogwildCoordinator(args.workers, args.width, args.height, args.max_steps, seed=args.seed)
+    try:
+        if args.load and os.path.exists(args.file):
+            try:
+                coordinator.load(args.file)
+            except ValueError as error:
+                parser.error(str(error))
+        stats = coordinator.train(args.episodes, args.save_every, args.file, args.report_every)
+    finally:
+        coordinator.close()
+
+    print(
+        f"{stats['workers']} workers : {stats['episodes']} épisodes, {stats['steps']} pas en "
+        f"{stats['elapsed']:.2f}s ({stats['steps_per_sec']:.0f} pas/s, {stats['episodes_per_sec']:.2f} épisodes/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import os
+import random
+import time
+
+from checkpoint import BackgroundSaver
+from metrics import MetricsStream
+from experience import ReplayBuffer, OfflineLearner, table_layout
+from telemetry import Telemetry
+from snake_engine import (
+    MAP_WIDTH, MAP_HEIGHT, generate_map,
+    REWARD_FOOD, REWARD_DIE,
+    FILE_AGENT, QTable, ArrayQTable, Snake, ScriptedSnake, Environment, observe, duel_step,
+)
+
+
+MAX_EPISODE_STEPS = 3000
+
+
+class TrainingLoop:
+    # Boucle commune à Trainer et Arena : les sous-classes fournissent reset() et step()
+    # et tiennent episode_score / episode_steps
+    def __init__(self, qtable, max_steps=MAX_EPISODE_STEPS, telemetry=None, metrics=None):
+        self.qtable = qtable
+        self.max_steps = max_steps
+        self.telemetry = telemetry if telemetry is not None else Telemetry('warning')
+        self.metrics = metrics
+
+        self.total_steps = 0
+        self.total_episodes = 0
+        self.last_score = 0
+        self.saver = BackgroundSaver()
+
+    def run_episode(self):
+        self.reset()
+        while not self.step():
+            pass
+        self.end_episode()
+        return self.episode_score
+
+    def end_episode(self):
+        self.total_episodes += 1
+        self.last_score = self.episode_score
+        if self.metrics is not None:
+            self.metrics.append(self.episode_score, self.episode_steps, self.qtable.epsilon, len(self.qtable))
+        self.qtable.update_epsilon()
+
+        self.telemetry.count('episodes')
+        self.telemetry.gauge('epsilon', self.qtable.epsilon)
+        self.telemetry.gauge('qtable_size', len(self.qtable))
+        self.telemetry.debug("Fin de l'épisode", score=self.episode_score, steps=self.episode_steps)
+
+    def train(self, episodes, save_every=0, filename=FILE_AGENT, report_every=10):
+        start = time.perf_counter()
+        for episode in range(1, episodes + 1):
+            self.run_episode()
+
+            if save_every and episode % save_every == 0:
+                self.qtable.save(filename, self.saver)
+            if report_every and episode % report_every == 0:
+                self.report(start)
+
+        if save_every:
+            self.qtable.save(filename, self.saver)
+            self.saver.flush()
+        return self.stats(start)
+
+    def stats(self, start):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        return {
+            "episodes": self.total_episodes,
+            "steps": self.total_steps,
+            "elapsed": elapsed,
+            "steps_per_sec": self.total_steps / elapsed,
+            "episodes_per_sec": self.total_episodes / elapsed,
+            "epsilon": self.qtable.epsilon,
+            "states": len(self.qtable),
+            "save_latency": self.saver.last_latency(),
+        }
+
+    def report_fields(self, stats):
+        return [
+            f"score {self.last_score}",
+            f"{stats['steps_per_sec']:.0f} pas/s",
+            f"{stats['episodes_per_sec']:.2f} épisodes/s",
+        ]
+
+    def report(self, start):
+        stats = self.stats(start)
+        fields = [f"Épisode {stats['episodes']}"] + self.report_fields(stats)
+        fields += [f"epsilon {stats['epsilon']:.3f}", f"états {stats['states']}"]
+        if stats['save_latency'] is not None:
+            fields.append(f"sauvegarde {stats['save_latency'] * 1000:.1f} ms")
+        print(" | ".join(fields))
+
+
+class Trainer(TrainingLoop):
+    def __init__(self, qtable, map_width=MAP_WIDTH, map_height=MAP_HEIGHT, max_steps=MAX_EPISODE_STEPS,
+                 telemetry=None, radar_range=3, radar_directions=4, learner=None, online=True, metrics=None):
+        super().__init__(qtable, max_steps, telemetry, metrics)
+        self.map_width = map_width
+        self.map_height = map_height
+        self.radar_range = radar_range
+        self.radar_directions = radar_directions
+        # learner enregistre les transitions pour des mises à jour par lots ; online=False
+        # laisse toutes les mises à jour à ces lots
+        self.learner = learner
+        self.online = online
+        self.reset()
+
+    def reset(self):
+        self.env = Environment(generate_map(self.map_width, self.map_height),
+                               radar_range=self.radar_range, radar_directions=self.radar_directions)
+        self.snake = Snake(start_position=(1, 1), qtable=self.qtable)
+        self.scripted_snake = ScriptedSnake(start_position=(self.env.height - 2, self.env.width - 2))
+        self.env.attach(self.snake)
+        self.env.attach(self.scripted_snake)
+        self.episode_steps = 0
+        self.episode_score = 0
+
+    def step(self):
+        state = observe(self.env, self.snake)
+        action = self.snake.decide_action(state)
+        new_state, reward, collision = duel_step(self.env, self.snake, self.scripted_snake, action)
+
+        if self.online:
+            self.snake.update_qtable(state, action, reward, new_state)
+        if self.learner is not None:
+            self.learner.record(state, action, reward, new_state)
+
+        self.episode_score += reward
+        self.episode_steps += 1
+        self.total_steps += 1
+        self.telemetry.tick()
+        if reward == REWARD_FOOD:
+            self.telemetry.count('food_eaten')
+
+        if collision:
+            self.telemetry.count('deaths' if collision == REWARD_DIE else 'kills')
+            return True
+        return self.episode_steps >= self.max_steps
+
+    def end_episode(self):
+        if self.learner is not None:
+            self.learner.update()
+        super().end_episode()
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement headless de Snake Wars")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--max-steps", type=int, default=MAX_EPISODE_STEPS)
+    parser.add_argument("--width", type=int, default=MAP_WIDTH)
+    parser.add_argument("--height", type=int, default=MAP_HEIGHT)
+    parser.add_argument("--save-every", type=int, default=10)
+    parser.add_argument("--report-every", type=int, default=10)
+    parser.add_argument("--file", default=FILE_AGENT)
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--radar-range", type=int, default=3)
+    parser.add_argument("--radar-directions", type=int, choices=[4, 8], default=4)
+    parser.add_argument("--replay", type=int, default=0, help="capacité du tampon de transitions (0 : désactivé)")
+    parser.add_argument("--replay-file", help="fichier où déborder les transitions du tampon")
+    parser.add_argument("--replay-batch", type=int, default=65536)
+    parser.add_argument("--replay-batches", type=int, default=1, help="lots rejoués à chaque fin d'épisode")
+    parser.add_argument("--offline", action="store_true", help="apprendre uniquement à partir du tampon")
+    parser.add_argument("--backend", choices=["array", "dict"],
+                        help="array par défaut, dict avec --radar-directions 8 (la table dense aurait 4^8 radars par case)")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error", "off"], default="warning")
+    parser.add_argument("--metrics", help="fichier de métriques (.jsonl, ou .prom pour Prometheus)")
+    parser.add_argument("--episodes-file", help="flux des scores par épisode (python metrics.py FICHIER pour le graphique)")
+    parser.add_argument("--aggregate-every", type=int, default=100, help="épisodes par point du graphique")
+    args = parser.parse_args()
+    if args.backend is None:
+        args.backend = "dict" if args.radar_directions == 8 else "array"
+    elif args.backend == "array" and args.radar_directions == 8:
+        parser.error("--radar-directions 8 nécessite --backend dict : la table dense ferait 4^8 états par case")
+    if (args.replay or args.offline) and args.backend != "array":
+        parser.error("le tampon de transitions nécessite --backend array (radar à 4 directions)")
+    if args.offline and not args.replay:
+        parser.error("--offline nécessite --replay")
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.backend == "array":
+        qtable = ArrayQTable(args.height, args.width, num_directions=args.radar_directions)
+    else:
+        qtable = QTable()
+    if args.load and os.path.exists(args.file):
+        try:
+            qtable.load(args.file)
+        except ValueError as error:
+            parser.error(str(error))
+
+    learner = None
+    if args.replay:
+        try:
+            replay = ReplayBuffer(args.replay, args.replay_file, table_layout(qtable), args.seed)
+        except ValueError as error:
+            parser.error(str(error))
+        learner = OfflineLearner(qtable, replay, args.replay_batch, args.replay_batches)
+
+    telemetry = Telemetry(args.log_level, args.metrics)
+    trainer = Trainer(qtable, args.width, args.height, args.max_steps, telemetry,
+                      args.radar_range, args.radar_directions, learner, not args.offline,
+                      MetricsStream(args.episodes_file, args.aggregate_every) if args.episodes_file else None)
+    stats = trainer.train(args.episodes, args.save_every, args.file, args.report_every)
+    trainer.saver.close()
+    if trainer.metrics is not None:
+        trainer.metrics.close()
+    if learner is not None:
+        learner.replay.close()
+    telemetry.flush()
+    print(
+        f"{stats['episodes']} épisodes, {stats['steps']} pas en {stats['elapsed']:.2f}s "
+        f"({stats['steps_per_sec']:.0f} pas/s, {stats['episodes_per_sec']:.2f} épisodes/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
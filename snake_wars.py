@@ -1,429 +1,305 @@
 import arcade
-import random
+import argparse
 import os
-import pickle
-import matplotlib.pyplot as plt
+import subprocess
+import sys
+import time
+from collections import deque
 
+from PIL import Image, ImageDraw
 
-SPRITE_SIZE = 32
-screen_width, screen_height = arcade.get_display_size()
-
-MAP_WIDTH = screen_width // SPRITE_SIZE
-MAP_HEIGHT = screen_height // SPRITE_SIZE
-
-MAP_WIDTH = 30
-MAP_HEIGHT = 25
-def generate_map(width, height):
-    map_data = ["x" * width]
-    for _ in range(height - 2):
-        map_data.append("x" + "." * (width - 2) + "x")
-    map_data.append("x" * width)
-    return "\n".join(map_data)
-
-
-REWARD_FOOD = 100
-REWARD_SURVIVAL = -1
-REWARD_BOMB = -100
-
-REWARD_KILL = 1000
-REWARD_DIE = -1000
-
-ACTION_UP = 'U'
-ACTION_DOWN = 'D'
-ACTION_LEFT = 'L'
-ACTION_RIGHT = 'R'
-ACTIONS = [ACTION_UP, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT]
-
-MOVES = {
-    ACTION_UP: (-1, 0),
-    ACTION_DOWN: (1, 0),
-    ACTION_LEFT: (0, -1),
-    ACTION_RIGHT: (0, 1)
-}
-
-FILE_AGENT = 'snake.qtable'
-
-def arg_max(table):
-    if not table:
-        return random.choice(ACTIONS)
-    return max(table, key=table.get)
-
-class QTable:
-    def __init__(self, learning_rate=0.9, discount_factor=0.95, epsilon=0.5):
-        self.table = {}
-        self.learning_rate = learning_rate
-        self.discount_factor = discount_factor
-        self.epsilon = epsilon
-
-    def update_epsilon(self, decay_rate=0.995, min_epsilon=0.1):
-        self.epsilon = max(min_epsilon, self.epsilon * decay_rate)
-
-
-    def set(self, state, action, reward, new_state):
-        state = tuple(state)
-        new_state = tuple(new_state)
-
-        if state not in self.table:
-            self.table[state] = {action: 0 for action in ACTIONS}
-        if new_state not in self.table:
-            self.table[new_state] = {action: 0 for action in ACTIONS}
-
-        max_future_q = max(self.table[new_state].values(), default=0)
-        self.table[state][action] += self.learning_rate * (reward + self.discount_factor * max_future_q - self.table[state][action])
-        #print(f"État : {state}, Action : {action}, Valeur Q mise à jour : {self.table[state][action]}")
-
-    def best_action(self, state):
-        if random.random() < self.epsilon:
-            return random.choice(ACTIONS)
-        else:
-            if state in self.table and self.table[state]:
-                action = arg_max(self.table[state])
-            else:
-                action = random.choice(ACTIONS)
-        return action
-
-    def save(self, filename):
-        with open(filename, 'wb') as file:
-            pickle.dump(self.table, file)
-
-    def load(self, filename):
-        with open(filename, 'rb') as file:
-            self.table = pickle.load(file)
-
-class Snake:
-    def __init__(self, start_position, qtable):
-        self.body = [start_position]
-        self.grow = False
-        self.qtable = qtable
-        self.total_reward = 0
-
-    def decide_action(self, state):
-        return self.qtable.best_action(state)
-
-    def update_qtable(self, state, action, reward, new_state):
-        self.qtable.set(state, action, reward, new_state)
-
-    def move(self, new_head):
-        if self.grow:
-            self.body = [new_head] + self.body
-            self.grow = False
-        else:
-            self.body = [new_head] + self.body[:-1]
-
-    def reduce_body(self, percentage):
-        if len(self.body) > 1:
-            segments_to_keep = max(1, int(len(self.body) * (1 - percentage)))
-            self.body = self.body[:segments_to_keep]
-
-class ScriptedSnake:
-    def __init__(self, start_position):
-        self.body = [start_position]
-        self.grow = False
+from checkpoint import BackgroundSaver
+from metrics import MetricsStream
+from profiler import PhaseProfiler
+from recording import EpisodeRecorder, EpisodeReplay
+from telemetry import Telemetry
 
-    def decide_action(self, env):
+from snake_engine import (
+    MAP_WIDTH, MAP_HEIGHT, generate_map,
+    REWARD_FOOD, REWARD_DIE,
+    ACTION_UP, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT,
+    FILE_AGENT, ArrayQTable, Snake, ScriptedSnake, Environment, observe, duel_step,
+)
 
-        head = self.body[0]
 
-        closest_food = min(
-            env.food_positions,
-            key=lambda food: abs(food[0] - head[0]) + abs(food[1] - head[1]),
-            default=None
-        )
-
-        safe_actions = []
-        for action, (dx, dy) in MOVES.items():
-            next_position = (head[0] + dx, head[1] + dy)
-
-            if next_position in env.walls or next_position in env.bomb_positions:
-                continue
-            if closest_food and next_position == closest_food:
-                return action
-            safe_actions.append(action)
-
-        return random.choice(safe_actions) if safe_actions else random.choice(ACTIONS)
-
-    def move(self, new_head):
-        if self.grow:
-            self.body = [new_head] + self.body
-            self.grow = False
+SPRITE_SIZE = 32
+WALL_RESOURCE = ":resources:images/tiles/brickGrey.png"
+GRID_COLOR = (40, 40, 40, 255)
+MIN_MOVE_INTERVAL = 0.00001
+# Garde-fous du pas fixe : au-delà, le retard est abandonné pour que la fenêtre reste réactive
+MAX_TICKS_PER_FRAME = 5000
+MAX_SIMULATION_TIME = 0.05
+
+
+def place_sprite(sprite, position, height):
+    sprite.center_x = (position[1] + 0.5) * SPRITE_SIZE
+    sprite.center_y = (height - position[0] - 0.5) * SPRITE_SIZE
+
+
+def bake_background(walls, height, width, grid=False):
+    # Murs (et grille) composés une fois dans une seule texture, dessinée comme un seul quad
+    brick = arcade.load_texture(WALL_RESOURCE).image.convert('RGBA').resize((SPRITE_SIZE, SPRITE_SIZE))
+    image = Image.new('RGBA', (width * SPRITE_SIZE, height * SPRITE_SIZE), (0, 0, 0, 0))
+    if grid:
+        draw = ImageDraw.Draw(image)
+        for x in range(1, height):
+            draw.line([(0, x * SPRITE_SIZE), (width * SPRITE_SIZE, x * SPRITE_SIZE)], fill=GRID_COLOR)
+        for y in range(1, width):
+            draw.line([(y * SPRITE_SIZE, 0), (y * SPRITE_SIZE, height * SPRITE_SIZE)], fill=GRID_COLOR)
+    for x, y in walls:
+        image.paste(brick, (y * SPRITE_SIZE, x * SPRITE_SIZE), brick)
+
+    sprite = arcade.Sprite()
+    sprite.texture = arcade.Texture(f"background-{height}x{width}-{hash((tuple(walls), grid))}", image)
+    sprite.center_x = width * SPRITE_SIZE / 2
+    sprite.center_y = height * SPRITE_SIZE / 2
+    background = arcade.SpriteList()
+    background.append(sprite)
+    return background
+
+
+class SpritePool:
+    # Les sprites rendus sont masqués et réutilisés plutôt que détruits
+    def __init__(self, resource, scale=SPRITE_SIZE / 128):
+        self.resource = resource
+        self.scale = scale
+        self.sprites = arcade.SpriteList()
+        self.free = []
+
+    def acquire(self, position, height):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.visible = True
         else:
-            self.body = [new_head] + self.body[:-1]
-
-    def reduce_body(self, percentage):
-        if len(self.body) > 1:
-            segments_to_keep = max(1, int(len(self.body) * (1 - percentage)))
-            self.body = self.body[:segments_to_keep]
-
-class Environment:
-    def __init__(self, map_text):
-        self.map = [list(row) for row in map_text.strip().split('\n')]
-        self.height = len(self.map)
-        self.width = len(self.map[0])
-        self.walls = self.create_walls()
-        self.food_positions = self.place_food(30)
-        self.bomb_positions = self.place_bombs(10)
-
-    def create_walls(self):
-        walls = []
-        for row_idx, row in enumerate(self.map):
-            for col_idx, cell in enumerate(row):
-                if cell == 'x':
-                    walls.append((row_idx, col_idx))
-        return walls
-
-    def place_food(self, num_food):
-        return self.place_items(num_food, exclude=self.walls)
-
-    def place_bombs(self, num_bombs):
-        return self.place_items(num_bombs, exclude=self.walls + self.food_positions)
-
-    def place_items(self, num_items, exclude):
-        positions = []
-        empty_spaces = [
-            (row_idx, col_idx)
-            for row_idx, row in enumerate(self.map)
-            for col_idx, cell in enumerate(row)
-            if cell == '.' and (row_idx, col_idx) not in exclude
-        ]
-        while len(positions) < num_items and empty_spaces:
-            pos = random.choice(empty_spaces)
-            positions.append(pos)
-            empty_spaces.remove(pos)
-        return positions
-
-    def get_game_state(self):
-        return {
-            "walls": self.walls,
-            "food": self.food_positions,
-            "bombs": self.bomb_positions,
-        }
-    '''
-    def get_extended_radar(self, head, scripted_positions):
-        directions = {
-            "UP": (-1, 0), "DOWN": (1, 0), "LEFT": (0, -1), "RIGHT": (0, 1),
-            "UP_LEFT": (-1, -1), "UP_RIGHT": (-1, 1), "DOWN_LEFT": (1, -1), "DOWN_RIGHT": (1, 1),
-        }
-        radar = {}
-
-        # Set pour vérification rapide
-        scripted_positions_set = set(scripted_positions)
-
-        for direction, (dx, dy) in directions.items():
-            x, y = head
-            radar[direction] = []
-            for step in range(1, 6):
-                x += dx
-                y += dy
-                position = (x, y)
-                if position in scripted_positions_set:
-                    radar[direction].append("SNAKE")
-                    break
-                elif position in self.walls:
-                    radar[direction].append("WALL")
-                    break
-                elif position in self.food_positions:
-                    radar[direction].append("FOOD")
-                    break
-                elif position in self.bomb_positions:
-                    radar[direction].append("BOMB")
-                    break
-                elif x < 0 or x >= self.height or y < 0 or y >= self.width:
-                    radar[direction].append("WALL")
-                    break
-                else:
-                    radar[direction].append("EMPTY")
-
-        return {dir: signals[0] if signals else "EMPTY" for dir, signals in radar.items()}
-
-    '''
-    #Affiché le radar à l'écran
-    def get_radar(self, head):
-        directions = {
-            ACTION_UP: (-1, 0),
-            ACTION_DOWN: (1, 0),
-            ACTION_LEFT: (0, -1),
-            ACTION_RIGHT: (0, 1),
-        }
-
-        radar = {}
-        for action, (dx, dy) in directions.items():
-            x, y = head
-            for _ in range(3): 
-                x += dx
-                y += dy
-                if x < 0 or x >= self.height or y < 0 or y >= self.width or (x, y) in self.walls:
-                    radar[action] = 'WALL'
-                    break
-                elif (x, y) in self.food_positions:
-                    radar[action] = 'FOOD'
-                    break
-                elif (x, y) in self.bomb_positions:
-                    radar[action] = 'BOMB'
-                    break
-                else:
-                    radar[action] = 'EMPTY'
-        print(radar)
-        return radar
-    '''
-    def get_immediate_neighbors(self, head):
-        neighbors = {}
-        directions = {
-            "UP": (-1, 0),
-            "DOWN": (1, 0),
-            "LEFT": (0, -1),
-            "RIGHT": (0, 1),
-            "UP_LEFT": (-1, -1),
-            "UP_RIGHT": (-1, 1),
-            "DOWN_LEFT": (1, -1),
-            "DOWN_RIGHT": (1, 1),
-        }
-
-        for direction, (dx, dy) in directions.items():
-            x, y = head[0] + dx, head[1] + dy
-
-            if x < 0 or x >= self.height or y < 0 or y >= self.width:
-                neighbors[direction] = "WALL"
-            elif (x, y) in self.walls:
-                neighbors[direction] = "WALL"
-            elif (x, y) in self.food_positions:
-                neighbors[direction] = "FOOD"
-            elif (x, y) in self.bomb_positions:
-                neighbors[direction] = "BOMB"
+            sprite = arcade.Sprite(self.resource, self.scale)
+            self.sprites.append(sprite)
+        place_sprite(sprite, position, height)
+        return sprite
+
+    def release(self, sprite):
+        sprite.visible = False
+        self.free.append(sprite)
+
+    def place_all(self, sprites, positions, height):
+        while len(sprites) > len(positions):
+            self.release(sprites.pop())
+        for i, position in enumerate(positions):
+            if i < len(sprites):
+                place_sprite(sprites[i], position, height)
             else:
-                neighbors[direction] = "EMPTY"
-
-        return neighbors
-    '''
-    def move(self, snake, action):
-        move = MOVES[action]
-        new_head = (snake.body[0][0] + move[0], snake.body[0][1] + move[1])
-
-        if new_head[0] < 0 or new_head[0] >= self.height or new_head[1] < 0 or new_head[1] >= self.width:
-            return snake.body[0], 0
-
-        if new_head in self.walls:
-            return snake.body[0], 0
-
-        if new_head in self.bomb_positions:
-            snake.reduce_body(0.5)
-            return new_head, REWARD_BOMB
+                sprites.append(self.acquire(position, height))
+
+    def draw(self):
+        self.sprites.draw()
+
+
+class BodySprites:
+    # Sprites des segments body[1:], synchronisés avec les compteurs de SnakeBody :
+    # seuls les segments ajoutés en tête et retirés en queue sont touchés
+    def __init__(self, pool):
+        self.pool = pool
+        self.sprites = deque()
+        self.body = None
+        self.pushed = 0
+        self.popped = 0
+
+    def sync(self, body, height):
+        heads = body.pushed - self.pushed
+        tails = body.popped - self.popped
+        if body is not self.body or tails > len(self.sprites) or heads >= len(body):
+            self.rebuild(body, height)
+        else:
+            for _ in range(tails):
+                self.pool.release(self.sprites.pop())
+            for i in range(heads, 0, -1):
+                self.sprites.appendleft(self.pool.acquire(body[i], height))
+            if len(self.sprites) != len(body) - 1:
+                self.rebuild(body, height)
+        self.body = body
+        self.pushed = body.pushed
+        self.popped = body.popped
+
+    def rebuild(self, body, height):
+        while self.sprites:
+            self.pool.release(self.sprites.pop())
+        for i in range(1, len(body)):
+            self.sprites.append(self.pool.acquire(body[i], height))
+
+    def draw(self):
+        self.pool.draw()
 
-        if new_head in self.food_positions:
-            self.food_positions.remove(new_head)
-            self.food_positions.append(self.place_food(1)[0])
-            snake.grow = True
-            return new_head, REWARD_FOOD
 
-        return new_head, REWARD_SURVIVAL
 class SnakeGame(arcade.Window):
-    def __init__(self, width, height, snake, env, agent):
-        calculated_width = MAP_WIDTH * SPRITE_SIZE
-        calculated_height = MAP_HEIGHT * SPRITE_SIZE + 70
+    def __init__(self, width, height, snake, env, agent, telemetry=None, profiler=None, profile_file='profile.csv',
+                 turbo=False, recorder=None, metrics=None, agent_file=FILE_AGENT):
+        calculated_width = width
+        calculated_height = height + 70
         super().__init__(calculated_width, calculated_height, "Snake Game", fullscreen=False)
         self.env = env
         self.snake = snake
         self.agent = agent
+        self.agent_file = agent_file
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+        self.profiler = profiler if profiler is not None else PhaseProfiler()
+        self.profile_file = profile_file
+        self.recorder = recorder
+        # Métriques par épisode sur disque ; le graphique en direct les lit dans un autre processus
+        self.metrics = metrics
+        self.plot_process = None
         arcade.set_background_color(arcade.color.BLACK)
 
         self.total_reward = 0
-        self.episode_history = []
         self.current_episode_score = 0
+        self.episode_steps = 0
         self.turn_count = 0
 
-        self.wall_sprites = None
-        self.food_sprites = None
-        self.snake_sprites = arcade.SpriteList()
+        # Fonds déjà composés, par disposition des murs et affichage de la grille
+        self.backgrounds = {}
+        self.background = None
+        self.show_grid = False
+        self.food_pool = SpritePool(":resources:images/items/star.png")
+        self.bomb_pool = SpritePool(":resources:images/tiles/bomb.png")
+        # food_sprites[i] affiche env.food_positions[i]
+        self.food_sprites = []
+        self.bomb_sprites = []
+        self.snake_sprites = BodySprites(SpritePool(":resources:images/topdown_tanks/treeGreen_large.png"))
 
         self.snake_head_sprite = arcade.Sprite("assets/snake_head.png", scale=1)
 
         self.scripted_snake = ScriptedSnake(start_position=(env.height - 2, env.width - 2))
-        self.scripted_snake_sprites = arcade.SpriteList()
+        self.scripted_snake_sprites = BodySprites(SpritePool(":resources:images/topdown_tanks/treeBrown_large.png"))
         self.scripted_snake_head_sprite = arcade.Sprite("assets/snake_head_brown.png", scale=1)
+        self.env.attach(self.snake)
+        self.env.attach(self.scripted_snake)
 
         self.time_since_last_move = 0
         self.snake_move_interval = 0.001
+        # Turbo : seuls les ticks affichés (le dernier de chaque frame) mettent à jour les sprites
+        self.turbo = turbo
+        self.ticks_last_frame = 0
         self.snake_direction = ACTION_RIGHT
         self.pending_direction = self.snake_direction
 
         self.manual_control = False
         self.save_counter = 0
+        self.saver = BackgroundSaver(on_save=self.record_save_latency)
 
-    def do(self):
-        head_position = self.snake.body[0]
-        #scripted_positions = self.scripted_snake.body
-        radar = self.env.get_radar(head_position)
+    def record_save_latency(self, latency):
+        self.telemetry.gauge('save_latency_ms', latency * 1000)
+
+    def do(self, render=True):
+        profiler = self.profiler
+        profiler.start()
+        self.episode_steps += 1
 
-        state = (
-            head_position,
-            tuple(radar.values()),
-        )
+        state = observe(self.env, self.snake)
+        profiler.mark('radar')
 
         if self.manual_control:
             self.snake_direction = self.pending_direction
         else:
             self.snake_direction = self.agent.best_action(state)
+        profiler.mark('action')
 
-        new_head, reward = self.env.move(self.snake, self.snake_direction)
-        #scripted_positions = self.scripted_snake.body
-        new_radar = self.env.get_radar(new_head)
-
-        collision_reward = self.check_collision()
-        if collision_reward != 0 :
-            reward = collision_reward
+        # Même tick que snake_trainer : la politique est jouée avec les règles de son entraînement
+        new_state, reward, collision = duel_step(self.env, self.snake, self.scripted_snake, self.snake_direction,
+                                                 profiler.mark)
 
-        print("Ici ",reward)
-        new_state = (
-            new_head,
-            tuple(new_radar.values()),
-        )
+        self.telemetry.debug("Récompense", reward=reward)
+        if reward == REWARD_FOOD:
+            self.telemetry.count('food_eaten')
         self.agent.set(state, self.snake_direction, reward, new_state)
+        profiler.mark('q_update')
 
-        self.snake.move(new_head)
-        self.update_snake_position()
-
-        self.update_food_positions()
+        if render:
+            self.update_snake_position()
+            self.update_food_positions()
+            self.update_scripted_snake_position()
+        profiler.mark('sprites')
 
         self.total_reward += reward
         self.current_episode_score += reward
 
-        scripted_action = self.scripted_snake.decide_action(self.env)
-        scripted_new_head, _ = self.env.move(self.scripted_snake, scripted_action)
-        self.scripted_snake.move(scripted_new_head)
-        self.update_scripted_snake_position()
+        if collision == REWARD_DIE:
+            self.telemetry.info("Le snake a touché le corps du scripted_snake. Le snake meurt.")
+            self.telemetry.count('deaths')
+        elif collision:
+            self.telemetry.info("Le scripted_snake a touché le corps du snake. Le scripted_snake meurt.")
+            self.telemetry.count('kills')
 
+        # La partie recommence à la fin du tick, une fois l'enregistrement fait
+        end = bool(collision)
         self.save_counter += 1
         if self.save_counter >= 3000:
             try:
-                self.agent.save(FILE_AGENT)
+                # Snapshot prise ici, écriture sur le thread du BackgroundSaver
+                self.agent.save(self.agent_file, self.saver)
                 self.turn_count += 1
-                print("QTable sauvegardée après 3000 coups.")
+                # La latence (jauge save_latency_ms) est relevée par le thread d'écriture à la fin de la sauvegarde
+                self.telemetry.info("Sauvegarde de la QTable lancée après 3000 coups")
             except Exception as e:
-                print(f"Erreur lors de la sauvegarde de la QTable : {e}")
-            self.end_episode()
+                self.telemetry.error(f"Erreur lors de la sauvegarde de la QTable : {e}")
+            end = True
             self.save_counter = 0
+        profiler.mark('checkpoint')
+
+        self.telemetry.tick()
+        if self.recorder is not None:
+            self.recorder.record(self.env, [self.snake, self.scripted_snake], reward, self.total_reward)
+        if end:
+            self.end_episode()
+            if render:
+                # setup() a replacé nourriture et bombes : les serpents suivent sur la nouvelle carte
+                self.update_snake_position()
+                self.update_scripted_snake_position()
+        profiler.end()
 
     def on_update(self, delta_time):
+        # Pas fixe : autant de ticks que l'intervalle en fait tenir depuis la dernière frame
         self.time_since_last_move += delta_time
+        ticks = min(int(self.time_since_last_move / self.snake_move_interval), MAX_TICKS_PER_FRAME)
+        if ticks == 0:
+            return
 
-        if self.time_since_last_move >= self.snake_move_interval:
-            self.time_since_last_move = 0
+        deadline = time.perf_counter() + MAX_SIMULATION_TIME
+        done = 0
+        try:
+            while done < ticks:
+                done += 1
+                last = done == ticks or time.perf_counter() >= deadline
+                self.do(render=last or not self.turbo)
+                if last:
+                    break
+        except Exception as e:
+            self.telemetry.error(f"Erreur dans on_update : {e}")
+            raise
 
-            try:
-                self.do()
-            except Exception as e:
-                print(f"Erreur dans on_update : {e}")
-                raise
+        if done < ticks or ticks == MAX_TICKS_PER_FRAME:
+            self.time_since_last_move = 0
+        else:
+            self.time_since_last_move -= done * self.snake_move_interval
+        self.ticks_last_frame = done
 
     def on_key_press(self, key, modifiers):
         if key == arcade.key.F:
-            self.plot_episode_history()
-            self.close()
+            self.open_live_plot()
+        elif key == arcade.key.T:
+            self.turbo = not self.turbo
+        elif key == arcade.key.G:
+            self.show_grid = not self.show_grid
+            self.update_background()
+        elif key == arcade.key.H:
+            self.profiler.toggle()
+        elif key == arcade.key.C:
+            if self.profiler.ticks:
+                rows = self.profiler.dump_csv(self.profile_file)
+                self.telemetry.info(f"Profil des phases écrit dans {self.profile_file}", ticks=rows)
         elif key == arcade.key.L:
             self.manual_control = not self.manual_control
         elif key == arcade.key.O:
             self.snake_move_interval = min(1.0, self.snake_move_interval * 2)
         elif key == arcade.key.P:
-            self.snake_move_interval = max(0.001, self.snake_move_interval / 2)
+            self.snake_move_interval = max(MIN_MOVE_INTERVAL, self.snake_move_interval / 2)
         elif self.manual_control:
             if key == arcade.key.Z:
                 self.pending_direction = ACTION_UP
@@ -434,27 +310,26 @@ class SnakeGame(arcade.Window):
             elif key == arcade.key.D:
                 self.pending_direction = ACTION_RIGHT
 
-    def create_sprites(self, positions, resource):
-        sprite_list = arcade.SpriteList()
-        for position in positions:
-            sprite = arcade.Sprite(resource, SPRITE_SIZE / 128)
-            sprite.center_x = position[1] * SPRITE_SIZE + SPRITE_SIZE // 2
-            sprite.center_y = (self.env.height - position[0] - 1) * SPRITE_SIZE + SPRITE_SIZE // 2
-            sprite_list.append(sprite)
-        return sprite_list
+    def update_background(self):
+        key = (tuple(self.env.walls), self.env.height, self.env.width, self.show_grid)
+        if key not in self.backgrounds:
+            self.backgrounds[key] = bake_background(self.env.walls, self.env.height, self.env.width, self.show_grid)
+        self.background = self.backgrounds[key]
 
     def setup(self):
         game_state = self.env.get_game_state()
 
-        self.wall_sprites = self.create_sprites(game_state["walls"], ":resources:images/tiles/brickGrey.png")
-        self.food_sprites = self.create_sprites(game_state["food"], ":resources:images/items/star.png")
-        self.bomb_sprites = self.create_sprites(game_state["bombs"], ":resources:images/tiles/bomb.png")
+        # Le fond n'est recomposé que si la carte change ; nourriture et bombes réutilisent leurs sprites
+        self.update_background()
+        self.food_pool.place_all(self.food_sprites, game_state["food"], self.env.height)
+        self.bomb_pool.place_all(self.bomb_sprites, game_state["bombs"], self.env.height)
+        self.env.dirty_food.clear()
 
     def on_draw(self):
         arcade.start_render()
-        self.wall_sprites.draw()
-        self.food_sprites.draw()
-        self.bomb_sprites.draw()
+        self.background.draw()
+        self.food_pool.draw()
+        self.bomb_pool.draw()
         self.snake_sprites.draw()
         self.snake_head_sprite.draw()
         self.scripted_snake_sprites.draw()
@@ -462,11 +337,25 @@ class SnakeGame(arcade.Window):
 
         arcade.draw_text(f"Score: {self.total_reward}", 10, self.height - 30, arcade.color.WHITE, 20)
         arcade.draw_text(f"Turns: {self.turn_count}", 10, self.height - 60, arcade.color.WHITE, 20)
+        if self.turbo:
+            arcade.draw_text(f"Turbo: {self.ticks_last_frame} ticks/frame", self.width - 200, self.height - 30,
+                             arcade.color.YELLOW, 14)
+        if self.profiler.enabled:
+            self.draw_profile()
+
+    def draw_profile(self):
+        # Moyenne glissante par phase, en colonnes de trois à côté du score
+        summary = self.profiler.summary()
+        lines = [f"tick {sum(seconds for _, seconds, _ in summary) * 1e6:.0f} µs"]
+        lines += [f"{phase} {seconds * 1e6:.0f} µs {share:.0%}" for phase, seconds, share in summary]
+        for i, line in enumerate(lines):
+            x = 220 + (i // 3) * 170
+            y = self.height - 20 - (i % 3) * 20
+            arcade.draw_text(line, x, y, arcade.color.LIGHT_GRAY, 11)
 
     def update_snake_position(self):
         head_position = self.snake.body[0]
-        self.snake_head_sprite.center_x = (head_position[1] + 0.5) * SPRITE_SIZE
-        self.snake_head_sprite.center_y = (self.env.height - head_position[0] - 0.5) * SPRITE_SIZE
+        place_sprite(self.snake_head_sprite, head_position, self.env.height)
 
         if self.snake_direction == ACTION_UP:
             self.snake_head_sprite.angle = 180
@@ -477,21 +366,11 @@ class SnakeGame(arcade.Window):
         elif self.snake_direction == ACTION_RIGHT:
             self.snake_head_sprite.angle = 90
 
-        while len(self.snake_sprites) > len(self.snake.body) - 1:
-            self.snake_sprites.pop().kill()
-
-        while len(self.snake_sprites) < len(self.snake.body) - 1:
-            sprite = arcade.Sprite(":resources:images/topdown_tanks/treeGreen_large.png", SPRITE_SIZE / 128)
-            self.snake_sprites.append(sprite)
-
-        for i, segment in enumerate(self.snake.body[1:]):
-            self.snake_sprites[i].center_x = (segment[1] + 0.5) * SPRITE_SIZE
-            self.snake_sprites[i].center_y = (self.env.height - segment[0] - 0.5) * SPRITE_SIZE
+        self.snake_sprites.sync(self.snake.body, self.env.height)
 
     def update_scripted_snake_position(self):
         head_position = self.scripted_snake.body[0]
-        self.scripted_snake_head_sprite.center_x = (head_position[1] + 0.5) * SPRITE_SIZE
-        self.scripted_snake_head_sprite.center_y = (self.env.height - head_position[0] - 0.5) * SPRITE_SIZE
+        place_sprite(self.scripted_snake_head_sprite, head_position, self.env.height)
 
         if len(self.scripted_snake.body) > 1:
             neck_position = self.scripted_snake.body[1]
@@ -504,83 +383,202 @@ class SnakeGame(arcade.Window):
             elif head_position[1] > neck_position[1]:
                 self.scripted_snake_head_sprite.angle = 90
 
-        while len(self.scripted_snake_sprites) > len(self.scripted_snake.body):
-            self.scripted_snake_sprites.pop().kill()
-
-        while len(self.scripted_snake_sprites) < len(self.scripted_snake.body):
-            sprite = arcade.Sprite(":resources:images/topdown_tanks/treeBrown_large.png", SPRITE_SIZE / 128)
-            self.scripted_snake_sprites.append(sprite)
-
-        for i, segment in enumerate(self.scripted_snake.body[1:]):
-            self.scripted_snake_sprites[i].center_x = (segment[1] + 0.5) * SPRITE_SIZE
-            self.scripted_snake_sprites[i].center_y = (self.env.height - segment[0] - 0.5) * SPRITE_SIZE
+        self.scripted_snake_sprites.sync(self.scripted_snake.body, self.env.height)
 
     def update_food_positions(self):
-        for i, food in enumerate(self.env.food_positions):
-            self.food_sprites[i].center_x = (food[1] + 0.5) * SPRITE_SIZE
-            self.food_sprites[i].center_y = (self.env.height - food[0] - 0.5) * SPRITE_SIZE
+        # Seules les nourritures remplacées depuis le dernier affichage sont déplacées
+        dirty = self.env.dirty_food
+        if not dirty:
+            return
+        food = self.env.food_positions
+        if len(self.food_sprites) != len(food):
+            self.food_pool.place_all(self.food_sprites, food, self.env.height)
+        else:
+            for i in dirty:
+                if i < len(food):
+                    place_sprite(self.food_sprites[i], food[i], self.env.height)
+        dirty.clear()
 
     def end_episode(self):
         try:
-            print(f"Fin de l'épisode. Score actuel : {self.current_episode_score}")
-            self.episode_history.append(self.current_episode_score)
-            self.episode_history = self.episode_history[-10000:]
+            self.telemetry.info("Fin de l'épisode", score=self.current_episode_score)
+            self.telemetry.count('episodes')
+            if self.metrics is not None:
+                self.metrics.append(self.current_episode_score, self.episode_steps, self.agent.epsilon, len(self.agent))
             self.current_episode_score = 0
+            self.episode_steps = 0
             self.total_reward = 0
 
             self.snake.total_reward = 0
-            self.snake.body = [(1, 1)]
-            self.snake.grow = False
-
-            self.scripted_snake.body = [(self.env.height - 2, self.env.width - 2)]
-            self.scripted_snake.grow = False
-
-            self.env = Environment(generate_map(MAP_WIDTH, MAP_HEIGHT))
-            qtable.update_epsilon()
-            print('Ceci est l\'epsilon', qtable.epsilon)
+            self.snake.reset((1, 1))
+            self.scripted_snake.reset((self.env.height - 2, self.env.width - 2))
+
+            self.env = Environment(generate_map(self.env.width, self.env.height),
+                                   radar_range=self.env.radar_range, radar_directions=self.env.radar_directions)
+            self.env.attach(self.snake)
+            self.env.attach(self.scripted_snake)
+            self.agent.update_epsilon()
+            self.telemetry.gauge('epsilon', self.agent.epsilon)
+            self.telemetry.gauge('qtable_size', len(self.agent))
             self.setup()
-            print("Nouvelle carte générée et sprites réinitialisés.")
+            self.telemetry.debug("Nouvelle carte générée et sprites réinitialisés", epsilon=self.agent.epsilon)
         except Exception as e:
-            print(f"Erreur dans end_episode : {e}")
+            self.telemetry.error(f"Erreur dans end_episode : {e}")
             raise
 
-    def plot_episode_history(self):
-        if self.episode_history:
-            plt.plot(self.episode_history)
-            plt.title("Scores des épisodes")
-            plt.xlabel("Épisode")
-            plt.ylabel("Score")
-            plt.grid()
-            plt.show()
-
-    def check_collision(self):
-        snake_head = self.snake.body[0]
-        scripted_snake_head = self.scripted_snake.body[0]
-
-        if snake_head == scripted_snake_head:
-            print("Les deux têtes se sont rencontrées, aucune action prise.")
+    def open_live_plot(self):
+        if self.metrics is None:
+            self.telemetry.warning("Aucun fichier de métriques : lancer avec --episodes-file")
+            return
+        if self.plot_process is not None and self.plot_process.poll() is None:
             return
+        # Processus séparé : le jeu continue pendant que le graphique se met à jour
+        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics.py")
+        self.plot_process = subprocess.Popen([sys.executable, script_path, self.metrics.filename])
 
-        if snake_head in self.scripted_snake.body[1:]:
-            print("Le snake a touché le corps du scripted_snake. Le snake meurt.")
-            self.end_episode()
-            return REWARD_DIE
 
-        if scripted_snake_head in self.snake.body[1:]:
-            print("Le scripted_snake a touché le corps du snake. Le scripted_snake meurt.")
-            self.end_episode()
-            return REWARD_KILL
-        return 0
+class ReplayViewer(arcade.Window):
+    # Relit un enregistrement sans environnement ni QTable : seek par keyframes, vitesse libre
+    def __init__(self, replay):
+        super().__init__(replay.width * SPRITE_SIZE, replay.height * SPRITE_SIZE + 70, "Snake Game - Replay", fullscreen=False)
+        arcade.set_background_color(arcade.color.BLACK)
+        self.replay = replay
+        self.ticks_per_second = 60.0
+        self.paused = False
+        self.time_since_last_tick = 0
+
+        self.backgrounds = {}
+        self.background = None
+        self.food_pool = SpritePool(":resources:images/items/star.png")
+        self.bomb_pool = SpritePool(":resources:images/tiles/bomb.png")
+        self.food_sprites = []
+        self.bomb_sprites = []
+        self.body_pools = [
+            SpritePool(":resources:images/topdown_tanks/treeGreen_large.png"),
+            SpritePool(":resources:images/topdown_tanks/treeBrown_large.png"),
+        ]
+        self.body_sprites = [[] for _ in self.body_pools]
+        self.head_sprites = [
+            arcade.Sprite("assets/snake_head.png", scale=1),
+            arcade.Sprite("assets/snake_head_brown.png", scale=1),
+        ]
+        self.synced_tick = None
+        self.sync_sprites()
+
+    def sync_sprites(self):
+        replay = self.replay
+        if replay.tick == self.synced_tick:
+            return
+        self.synced_tick = replay.tick
+
+        key = (tuple(replay.walls), replay.height, replay.width)
+        if key not in self.backgrounds:
+            self.backgrounds[key] = bake_background(replay.walls, replay.height, replay.width)
+        self.background = self.backgrounds[key]
+
+        self.food_pool.place_all(self.food_sprites, replay.food, replay.height)
+        self.bomb_pool.place_all(self.bomb_sprites, replay.bombs, replay.height)
+        for body, pool, sprites, head in zip(replay.snakes, self.body_pools, self.body_sprites, self.head_sprites):
+            segments = list(body)
+            pool.place_all(sprites, segments[1:], replay.height)
+            if segments:
+                place_sprite(head, segments[0], replay.height)
+
+    def on_update(self, delta_time):
+        if self.paused:
+            return
+        self.time_since_last_tick += delta_time * self.ticks_per_second
+        ticks = int(self.time_since_last_tick)
+        if ticks:
+            self.time_since_last_tick -= ticks
+            self.replay.advance(ticks)
+            if self.replay.at_end():
+                self.paused = True
+            self.sync_sprites()
+
+    def seek(self, tick):
+        self.replay.seek(tick)
+        self.sync_sprites()
+
+    def on_key_press(self, key, modifiers):
+        if key == arcade.key.SPACE:
+            self.paused = not self.paused
+        elif key == arcade.key.O:
+            self.ticks_per_second = max(1.0, self.ticks_per_second / 2)
+        elif key == arcade.key.P:
+            self.ticks_per_second = min(100000.0, self.ticks_per_second * 2)
+        elif key == arcade.key.LEFT:
+            self.seek(self.replay.tick - 500)
+        elif key == arcade.key.RIGHT:
+            self.seek(self.replay.tick + 500)
+        elif key == arcade.key.HOME:
+            self.seek(0)
+        elif key == arcade.key.END:
+            self.seek(self.replay.last_tick)
+
+    def on_draw(self):
+        arcade.start_render()
+        self.background.draw()
+        self.food_pool.draw()
+        self.bomb_pool.draw()
+        for pool, head in zip(self.body_pools, self.head_sprites):
+            pool.draw()
+            head.draw()
+
+        arcade.draw_text(f"Score: {self.replay.score}", 10, self.height - 30, arcade.color.WHITE, 20)
+        arcade.draw_text(f"Tick: {self.replay.tick}/{self.replay.last_tick}", 10, self.height - 60, arcade.color.WHITE, 20)
+        status = "Pause" if self.paused else f"{self.ticks_per_second:.0f} ticks/s"
+        arcade.draw_text(status, self.width - 200, self.height - 30, arcade.color.YELLOW, 14)
 
 
 if __name__ == "__main__":
-    MAP = generate_map(MAP_WIDTH, MAP_HEIGHT)
+    parser = argparse.ArgumentParser(description="Snake Wars")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error", "off"], default="info")
+    parser.add_argument("--metrics", help="fichier de métriques (.jsonl, ou .prom pour Prometheus)")
+    parser.add_argument("--width", type=int, default=MAP_WIDTH)
+    parser.add_argument("--height", type=int, default=MAP_HEIGHT)
+    parser.add_argument("--turbo", action="store_true", help="ne mettre à jour les sprites qu'une fois par frame (touche T)")
+    parser.add_argument("--profile", action="store_true", help="activer le profilage des phases (touche H)")
+    parser.add_argument("--profile-file", default="profile.csv", help="CSV du profil des phases (touche C)")
+    parser.add_argument("--episodes-file", default="snake_episodes.jsonl", help="métriques par épisode (touche F pour le graphique)")
+    parser.add_argument("--aggregate-every", type=int, default=10, help="épisodes par point du graphique")
+    parser.add_argument("--record", help="enregistrer la partie tick par tick dans ce fichier")
+    parser.add_argument("--replay", help="relire un enregistrement au lieu de jouer")
+    parser.add_argument("--file", default=FILE_AGENT, help="QTable chargée au lancement et sauvegardée en jeu")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay = EpisodeReplay(args.replay)
+        ReplayViewer(replay)
+        arcade.run()
+        replay.close()
+        raise SystemExit
+    telemetry = Telemetry(args.log_level, args.metrics)
+    profiler = PhaseProfiler(args.profile)
+
+    MAP = generate_map(args.width, args.height)
     env = Environment(MAP)
 
-    qtable = QTable()
+    qtable = ArrayQTable(args.height, args.width)
+    # Reprend la table entraînée (snake_trainer.py) : sans chargement, la première sauvegarde la remplacerait
+    if os.path.exists(args.file):
+        try:
+            qtable.load(args.file)
+        except ValueError as error:
+            parser.error(str(error))
     snake = Snake(start_position=(1, 1), qtable=qtable)
 
-    game = SnakeGame(SPRITE_SIZE * MAP_WIDTH, SPRITE_SIZE * MAP_HEIGHT, snake, env, qtable)
+    game = SnakeGame(SPRITE_SIZE * args.width, SPRITE_SIZE * args.height, snake, env, qtable, telemetry,
+                     profiler, args.profile_file, args.turbo,
+                     EpisodeRecorder(args.record) if args.record else None,
+                     MetricsStream(args.episodes_file, args.aggregate_every) if args.episodes_file else None,
+                     args.file)
 
     game.setup()
-    arcade.run()
\ No newline at end of file
+    arcade.run()
+    game.saver.close()
+    if game.recorder is not None:
+        game.recorder.close()
+    if game.metrics is not None:
+        game.metrics.close()
+    telemetry.flush()
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from functools import partial
+
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40, 'off': 100}
+
+# Nombre de ticks entre deux lectures de l'horloge pour le flush périodique
+FLUSH_CHECK_TICKS = 256
+
+
+def noop(*args, **fields):
+    pass
+
+
+class Telemetry:
+    def __init__(self, level='info', path=None, fmt=None, flush_interval=10.0, prefix='snake_wars'):
+        self.path = path
+        if fmt is None:
+            fmt = 'prometheus' if path and path.endswith('.prom') else 'jsonl'
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.prefix = prefix
+
+        self.counters = {'ticks': 0}
+        self.gauges = {}
+        self.last_flush_time = time.perf_counter()
+        self.last_flush_ticks = 0
+        self.ticks_per_sec = 0.0
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = LEVELS[level]
+        # Les niveaux désactivés deviennent des no-op : aucun formatage ni I/O
+        for name in ('debug', 'info', 'warning', 'error'):
+            if LEVELS[name] >= self.level:
+                setattr(self, name, partial(self.log, name))
+            else:
+                setattr(self, name, noop)
+
+    def log(self, level, message, **fields):
+        if fields:
+            message += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        print(f"[{level}] {message}")
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def tick(self):
+        ticks = self.counters['ticks'] + 1
+        self.counters['ticks'] = ticks
+        if ticks % FLUSH_CHECK_TICKS == 0 and time.perf_counter() - self.last_flush_time >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        now = time.perf_counter()
+        elapsed = now - self.last_flush_time
+        ticks = self.counters['ticks']
+        if elapsed > 0:
+            self.ticks_per_sec = (ticks - self.last_flush_ticks) / elapsed
+        self.last_flush_time = now
+        self.last_flush_ticks = ticks
+
+        record = {'time': time.time(), 'ticks_per_sec': self.ticks_per_sec}
+        record.update(self.counters)
+        record.update(self.gauges)
+        return record
+
+    def flush(self):
+        record = self.snapshot()
+        if not self.path:
+            return record
+
+        if self.fmt == 'prometheus':
+            self.write_prometheus(record)
+        else:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(record) + '\n')
+        return record
+
+    def write_prometheus(self, record):
+        lines = []
+        for name, value in record.items():
+            if name == 'time' or not isinstance(value, (int, float)):
+                continue
+            metric = f"{self.prefix}_{name}"
+            if name in self.counters:
+                metric += '_total'
+                lines.append(f"# TYPE {metric} counter")
+            else:
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        # Réécriture atomique pour qu'un scrape ne lise jamais un fichier partiel
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)